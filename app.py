@@ -1,26 +1,103 @@
 import streamlit as st
 import io
-from document_processor import process_document
-from classifier import classify_document
-from income_extractor import IncomeExtractor
-from utils import is_valid_file, display_results
-import tempfile
+import json
 import os
-from helpers.get_gpt_response import analyze_loan_approval
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from disk_cache import make_cache_key
+from pipeline import analyze_document, ocr_tier_stats
+from income_extractor import IncomeExtractor
+from utils import is_valid_file, display_results, display_metrics_panel
+from helpers.get_gpt_response import LoanAnalysisError, analyze_loan_approval, get_response_cache
+from helpers.decision_engine import decide, decision_stats
+from metrics import METRICS, start_http_server
 import asyncio
 
+# Uploads processed at the same time
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS") or min(4, os.cpu_count() or 1))
+# Pipeline results kept per session, keyed by upload content
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE") or 64)
+# Prometheus text output: a file rewritten after each run and/or an HTTP /metrics port
+METRICS_FILE = os.getenv("METRICS_FILE")
+METRICS_PORT = int(os.getenv("METRICS_PORT") or 0)
+
 st.set_page_config(
     page_title="Document Classifier",
     page_icon="📄",
     layout="wide"
 )
 
+@st.cache_resource
+def get_income_extractor():
+    """One IncomeExtractor (and its compiled patterns) shared by every rerun and session"""
+    return IncomeExtractor()
+
+@st.cache_resource
+def get_upload_executor():
+    """Upload threads shared by every rerun, so OCR engines cached per thread stay loaded"""
+    return ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix='upload')
+
+@st.cache_resource
+def start_metrics_server():
+    """Serve /metrics once per process when METRICS_PORT is set"""
+    return start_http_server(METRICS_PORT) if METRICS_PORT else None
+
+def upload_key(file):
+    """Cache key for an upload's bytes and type; renaming a file doesn't change it"""
+    return make_cache_key(file.type, file.getvalue())
+
+def get_result_cache():
+    """This session's LRU of pipeline results by upload_key"""
+    if 'result_cache' not in st.session_state:
+        st.session_state.result_cache = OrderedDict()
+    return st.session_state.result_cache
+
+def process_file(file, income_extractor):
+    """Process, classify and extract income from one upload, returning its result.
+
+    Runs on a worker thread, so it must not call Streamlit; any failure is
+    reported in the result instead of raised.
+    """
+    if not is_valid_file(file):
+        return {
+            'filename': file.name,
+            'type': 'unknown',
+            'status': 'error',
+            'message': 'Invalid file format'
+        }
+
+    try:
+        # Process, classify and extract straight from the upload buffer, stopping
+        # once the type is clear and the extractor has its pages; scans are read
+        # with fast OCR first and only re-read in full when the result is doubtful
+        document, doc_type, income_data = analyze_document(file, file.type, income_extractor)
+
+        return {
+            'filename': file.name,
+            'type': doc_type,
+            'status': 'success',
+            'income_data': income_data
+        }
+    except Exception as e:
+        return {
+            'filename': file.name,
+            'type': 'unknown',
+            'status': 'error',
+            'message': str(e)
+        }
+
 def main():
     st.title("Document Classification System")
     st.write("Upload PDFs and images to classify them and extract income information.")
 
-    # Initialize income extractor
-    income_extractor = IncomeExtractor()
+    # Shared across reruns instead of rebuilt on every widget interaction
+    income_extractor = get_income_extractor()
+    start_metrics_server()
+
+    bypass_cache = st.sidebar.checkbox(
+        "Bypass AI response cache",
+        help="Ask the model again even if these results were already analyzed"
+    )
 
     # File uploader
     uploaded_files = st.file_uploader(
@@ -32,59 +109,41 @@ def main():
     if uploaded_files:
         progress_bar = st.progress(0)
         status_text = st.empty()
-        results = []
-
-        for idx, file in enumerate(uploaded_files):
-            try:
-                if is_valid_file(file):
-                    # Create a temporary file
-                    with tempfile.NamedTemporaryFile(delete=False) as tmp_file:
-                        tmp_file.write(file.getvalue())
-                        tmp_file_path = tmp_file.name
-
-                    # Process document (Extract text from PDF or Image)
-                    processed_content = process_document(tmp_file_path, file.type)
-                    
-                    # Classify document type
-                    doc_type = classify_document(processed_content)
-                    income_data = {}  # Initialize income data dictionary
-
-                    
-
-                    # Extract income for single-page documents (e.g., images)
-                    income_data = income_extractor.extract_income(processed_content, doc_type)
-
-                    # Store results
-                    results.append({
-                        'filename': file.name,
-                        'type': doc_type,
-                        'status': 'success',
-                        'income_data': income_data
-                    })
-
-                    # Clean up temporary file
-                    os.unlink(tmp_file_path)
-
-                else:
-                    results.append({
-                        'filename': file.name,
-                        'type': 'unknown',
-                        'status': 'error',
-                        'message': 'Invalid file format'
-                    })
-
-                # Update progress bar
-                progress = (idx + 1) / len(uploaded_files)
-                progress_bar.progress(progress)
-                status_text.text(f'Processing file {idx + 1} of {len(uploaded_files)}')
-
-            except Exception as e:
-                results.append({
-                    'filename': file.name,
-                    'type': 'unknown',
-                    'status': 'error',
-                    'message': str(e)
-                })
+        finished = st.container()  # One line per file as it completes
+        results = [None] * len(uploaded_files)  # Filled by upload index so the order stays stable
+
+        # Reruns only process uploads whose bytes haven't been seen this session
+        result_cache = get_result_cache()
+        keys = [upload_key(file) for file in uploaded_files]
+        pending = []
+        for idx, (file, key) in enumerate(zip(uploaded_files, keys)):
+            if key in result_cache:
+                result_cache.move_to_end(key)
+                results[idx] = dict(result_cache[key], filename=file.name)
+            else:
+                pending.append(idx)
+
+        # Files run concurrently and share the one OCR process pool
+        executor = get_upload_executor()
+        futures = {
+            executor.submit(process_file, uploaded_files[idx], income_extractor): idx
+            for idx in pending
+        }
+        for done, future in enumerate(as_completed(futures), len(uploaded_files) - len(pending) + 1):
+            result = future.result()
+            results[futures[future]] = result
+            if result['status'] == 'success':
+                # Failures may be transient, so only successes are remembered
+                result_cache[keys[futures[future]]] = result
+                while len(result_cache) > RESULT_CACHE_SIZE:
+                    result_cache.popitem(last=False)
+                finished.write(f"✅ {result['filename']}: {result['type']}")
+            else:
+                finished.write(f"❌ {result['filename']}: {result['message']}")
+
+            # Update progress bar
+            progress_bar.progress(done / len(uploaded_files))
+            status_text.text(f'Processed {done} of {len(uploaded_files)} files')
 
         # Clear progress bar and status message
         progress_bar.empty()
@@ -93,19 +152,61 @@ def main():
         # Display results
         display_results(results)
 
-            # Call AI for loan approval analysis
-        if doc_type.lower() != "unknown":
-            with st.status("Analyzing loan eligibility with AI...", expanded=True) as status:
-                try:
-                    gpt_response = asyncio.run(analyze_loan_approval(results))
-                    status.update(label="Loan analysis completed!", state="complete", expanded=False)
-                except Exception as e:
-                    status.update(label="Loan analysis failed!", state="error", expanded=False)
-                    gpt_response = f"Error: {str(e)}"
-                    st.error(f"AI analysis failed: {str(e)}")
+        # Clear-cut applications are decided locally; only ambiguous ones go to the model.
+        # Widget reruns over the same results are one application, counted once
+        decision_key = make_cache_key(json.dumps(results, sort_keys=True, default=str))
+        new_results = st.session_state.get('decided_key') != decision_key
+        st.session_state.decided_key = decision_key
+        decision = decide(results, count=new_results)
+        if decision['decision'] != 'escalate':
+            st.markdown(f"### Loan Decision: \n {decision['message']}")
+            st.caption("Decided by local rules without an AI call")
+        else:
+            st.caption(f"Escalated to AI analysis: {decision['reason']}")
+            # Reruns over the same results reuse the last decision instead of calling the model again
+            cached_decision = st.session_state.get('loan_decision')
+            if not bypass_cache and cached_decision and cached_decision[0] == decision_key:
+                gpt_response = cached_decision[1]
+            else:
+                with st.status("Analyzing loan eligibility with AI...", expanded=True) as status:
+                    try:
+                        gpt_response = asyncio.run(analyze_loan_approval(results, use_cache=not bypass_cache))
+                        st.session_state.loan_decision = (decision_key, gpt_response)
+                        status.update(label="Loan analysis completed!", state="complete", expanded=False)
+                    except Exception as e:
+                        # Failures are not memoized, so the next rerun asks the model again
+                        status.update(label="Loan analysis failed!", state="error", expanded=False)
+                        gpt_response = str(e) if isinstance(e, LoanAnalysisError) else f"Error: {str(e)}"
+                        st.error(f"AI analysis failed: {str(e)}")
 
             # Display AI decision
             st.markdown(f"### Loan Decision: \n {gpt_response}")
 
+    display_metrics_panel(METRICS.snapshot())
+    if METRICS_FILE:
+        METRICS.write_prometheus(METRICS_FILE)
+
+    engine_stats = decision_stats()
+    if engine_stats['decisions']:
+        st.sidebar.caption(
+            f"Local decisions: {engine_stats['decided_locally']} of {engine_stats['decisions']} "
+            f"({engine_stats['llm_calls_avoided_pct']:.0f}% of AI calls avoided)"
+        )
+
+    tier_stats = ocr_tier_stats()
+    if tier_stats['documents']:
+        st.sidebar.caption(
+            f"Fast OCR sufficed for {tier_stats['fast_sufficed']} of {tier_stats['documents']} scanned documents "
+            f"({tier_stats['fast_sufficed_pct']:.0f}%)"
+        )
+
+    response_cache = get_response_cache()
+    if response_cache is not None:
+        cache_stats = response_cache.stats()
+        st.sidebar.caption(
+            f"AI response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+            f"({cache_stats['hit_rate']:.0%} hit rate)"
+        )
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
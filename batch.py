@@ -0,0 +1,165 @@
+"""Headless batch processing of archived documents into JSONL.
+
+Walks a directory (or reads a manifest with one path per line), runs each
+document through processing, classification and income extraction in a
+process pool, and appends one JSON record per document to the output file.
+Documents already recorded in the output are skipped, so an interrupted run
+picks up where it left off. --retry-errors appends a fresh record for each
+document that failed before, so a path can appear more than once: the last
+record for a path is the current one (read_records returns just those).
+
+    python batch.py archive/ --output results.jsonl --workers 8
+    python batch.py --manifest files.txt --output results.jsonl --retry-errors
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from pipeline import run_pipeline
+from income_extractor import IncomeExtractor
+
+MIME_TYPES = {
+    '.pdf': 'application/pdf',
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg'
+}
+
+STAGES = ('process', 'classify', 'extract')
+
+# Set in each worker by _init_worker
+_extractor = None
+
+def find_documents(directory):
+    """Yield supported document paths under directory, in a stable order"""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in MIME_TYPES:
+                yield os.path.join(root, name)
+
+def read_manifest(manifest):
+    """Yield paths listed in a manifest file; relative paths are taken from the manifest's directory"""
+    base = os.path.dirname(os.path.abspath(manifest))
+    with open(manifest, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield os.path.join(base, line)
+
+def read_records(output):
+    """Return the last record for each path in an output file, keyed by path"""
+    records = {}
+    if not os.path.exists(output):
+        return records
+    with open(output, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Partial line from an interrupted run
+            records[record['path']] = record
+    return records
+
+def load_done(output, retry_errors=False):
+    """Return the paths already recorded in an existing output file, judged by their latest record"""
+    return {
+        path for path, record in read_records(output).items()
+        if not retry_errors or record.get('status') == 'success'
+    }
+
+def _init_worker(max_gap, time_budget, log_level):
+    global _extractor
+    logging.getLogger().setLevel(log_level)
+    _extractor = IncomeExtractor(max_gap=max_gap, time_budget=time_budget)
+
+def process_file(path):
+    """Run one document through the pipeline and return its output record"""
+    record = {'path': path, 'filename': os.path.basename(path)}
+    timings = {}
+    stats = {}
+    try:
+        mime_type = MIME_TYPES[os.path.splitext(path)[1].lower()]
+        # The pool already uses every core, so OCR within a document stays in-process
+        doc_type, income_data = run_pipeline(path, mime_type, _extractor, max_workers=1, timings=timings,
+                                             stats=stats)
+        record.update(type=doc_type, status='success', income_data=income_data)
+        if 'ocr_tier' in stats:
+            record['ocr'] = {'tier': stats['ocr_tier'], 'escalation': stats['ocr_escalation']}
+    except Exception as e:
+        record.update(type='unknown', status='error', message=str(e))
+    record['timings'] = timings
+    return record
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('directory', nargs='?', help='directory to walk for PDF and image files')
+    parser.add_argument('--manifest', help='file listing one document path per line')
+    parser.add_argument('--output', '-o', required=True, help='JSONL file to append records to')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--retry-errors', action='store_true', help='reprocess documents recorded with an error')
+    parser.add_argument('--max-gap', type=int, default=None, help='bound label-to-amount distance in characters')
+    parser.add_argument('--time-budget', type=float, default=None, help='per-document regex budget in seconds')
+    parser.add_argument('--log-level', default='WARNING')
+    parser.add_argument('--progress-every', type=int, default=100, help='print throughput every N documents')
+    args = parser.parse_args()
+
+    if bool(args.directory) == bool(args.manifest):
+        parser.error('pass either a directory or --manifest')
+
+    logging.getLogger().setLevel(args.log_level)
+    paths = read_manifest(args.manifest) if args.manifest else find_documents(args.directory)
+    done = load_done(args.output, args.retry_errors)
+    pending = [path for path in paths if path not in done]
+    print(f"{len(pending)} documents to process, {len(done)} already done", file=sys.stderr)
+    if not pending:
+        return
+
+    # Start on a fresh line if the last run was cut off mid-record
+    if os.path.exists(args.output) and os.path.getsize(args.output):
+        with open(args.output, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b'\n'
+    else:
+        needs_newline = False
+
+    stage_totals = dict.fromkeys(STAGES, 0.0)
+    counts = {'success': 0, 'error': 0}
+    ocr_counts = {'documents': 0, 'fast_sufficed': 0}
+    start = time.perf_counter()
+
+    with open(args.output, 'a', encoding='utf-8') as out, multiprocessing.Pool(
+        args.workers, initializer=_init_worker, initargs=(args.max_gap, args.time_budget, args.log_level)
+    ) as pool:
+        if needs_newline:
+            out.write('\n')
+        for n, record in enumerate(pool.imap_unordered(process_file, pending), 1):
+            out.write(json.dumps(record, default=str) + '\n')
+            out.flush()  # Each finished document survives an interruption
+
+            counts[record['status']] += 1
+            for stage, seconds in record['timings'].items():
+                stage_totals[stage] += seconds
+            if 'ocr' in record:
+                ocr_counts['documents'] += 1
+                ocr_counts['fast_sufficed'] += record['ocr']['escalation'] is None
+            if n % args.progress_every == 0:
+                elapsed = time.perf_counter() - start
+                print(f"{n}/{len(pending)} documents, {n / elapsed:.1f} docs/sec", file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    total = len(pending)
+    print(f"Processed {total} documents in {elapsed:.1f}s ({total / elapsed:.1f} docs/sec), "
+          f"{counts['success']} succeeded, {counts['error']} failed", file=sys.stderr)
+    for stage in STAGES:
+        print(f"  {stage:<9} {stage_totals[stage]:9.1f}s total  {stage_totals[stage] / total * 1000:9.1f} ms/doc",
+              file=sys.stderr)
+    if ocr_counts['documents']:
+        print(f"  fast OCR sufficed for {ocr_counts['fast_sufficed']} of {ocr_counts['documents']} scanned documents",
+              file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
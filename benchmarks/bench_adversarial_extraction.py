@@ -0,0 +1,68 @@
+"""Worst-case IncomeExtractor latency on adversarial OCR text.
+
+Builds a long single-line OCR dump (process_image collapses all whitespace)
+full of labels with no nearby amount and digits with no nearby label, then
+times every extraction path with unbounded matching and with a bounded
+window plus a per-document time budget.
+
+    python -m benchmarks.bench_adversarial_extraction --pages 100 --max-gap 120 --budget 0.5
+"""
+import argparse
+import logging
+import random
+import time
+
+from income_extractor import IncomeExtractor
+
+NOISE_WORDS = [
+    'box', '1', 'rate', 'wages', 'gross', 'ytd', 'year', 'to', 'total', 'hours', 'regular',
+    'pay', 'compensation', 'medicare', 'social', 'security', '$', '|', 'l', 'i', '0', '7.',
+    'per', 'current', 'period', 'net', 'amount', 'income', 'date', 'end'
+]
+
+def adversarial_text(pages, words_per_page=400, seed=0):
+    """Noisy OCR-like text on one line, roughly words_per_page tokens per page"""
+    rng = random.Random(seed)
+    return ' '.join(rng.choice(NOISE_WORDS) for _ in range(pages * words_per_page))
+
+def worst_case(extractor, text):
+    """Return (doc type, seconds) for the slowest extraction path"""
+    timings = []
+    for doc_type in ('W2', 'Paystub', 'Unknown'):
+        start = time.perf_counter()
+        extractor.extract_income(text, doc_type)
+        timings.append((doc_type, time.perf_counter() - start))
+    return max(timings, key=lambda item: item[1])
+
+def report(label, doc_type, elapsed):
+    print(f"{label:<32} worst {elapsed:8.3f}s ({doc_type})")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=100)
+    parser.add_argument('--max-gap', type=int, default=120)
+    parser.add_argument('--budget', type=float, default=0.5, help='per-document regex budget in seconds')
+    parser.add_argument('--skip-unbounded', action='store_true', help='only time the bounded mode')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    text = adversarial_text(args.pages)
+    print(f"{args.pages} pages of adversarial OCR text, {len(text):,} characters on one line")
+
+    if not args.skip_unbounded:
+        doc_type, elapsed = worst_case(IncomeExtractor(), text)
+        report('unbounded', doc_type, elapsed)
+
+    doc_type, elapsed = worst_case(IncomeExtractor(max_gap=args.max_gap), text)
+    report(f'bounded window ({args.max_gap} chars)', doc_type, elapsed)
+
+    bounded = IncomeExtractor(max_gap=args.max_gap, time_budget=args.budget)
+    doc_type, elapsed = worst_case(bounded, text)
+    report(f'bounded + {args.budget}s budget', doc_type, elapsed)
+
+    # The budget is checked between pattern scans, so allow one bounded scan of overrun
+    limit = args.budget * 2 + 0.5
+    assert elapsed <= limit, f"bounded extraction took {elapsed:.3f}s, above the {limit:.3f}s limit"
+
+if __name__ == '__main__':
+    main()
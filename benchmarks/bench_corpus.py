@@ -0,0 +1,282 @@
+"""Latency, throughput, memory and accuracy of the pipeline on the synthetic corpus.
+
+Runs every document of a benchmarks.synthetic_corpus corpus through
+run_pipeline and reports per-stage latency percentiles (overall and per
+format), documents and pages per second, peak RSS and classification and
+field extraction accuracy against the manifest. Results are written to JSON
+so runs on different commits can be compared with --compare. The OCR cache
+is disabled so every run pays for OCR; text-only runs need no tesseract.
+Run with OCR_TIERED=0 in the environment to measure the full OCR pass alone.
+
+    python -m benchmarks.bench_corpus --output before.json
+    python -m benchmarks.bench_corpus --corpus corpus/ --output after.json --compare before.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from benchmarks.synthetic_corpus import add_corpus_arguments, generate_from_args, load_manifest
+
+STAGES = ('process', 'classify', 'extract', 'total')
+PERCENTILES = (50, 90, 99)
+
+# Relative tolerance per field; anything not listed must match to the cent
+FIELD_TOLERANCE = {'annualized_income': 0.05}
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+def summarize(samples):
+    """Milliseconds summary of a list of durations in seconds"""
+    values = sorted(samples)
+    summary = {f'p{pct}': round(percentile(values, pct) * 1000, 3) for pct in PERCENTILES}
+    summary['mean'] = round(sum(values) / len(values) * 1000, 3)
+    summary['max'] = round(values[-1] * 1000, 3)
+    return summary
+
+def field_matches(field, actual, expected):
+    if not isinstance(actual, (int, float)):
+        return False
+    tolerance = FIELD_TOLERANCE.get(field)
+    if tolerance is None:
+        return abs(actual - expected) < 0.005
+    return abs(actual - expected) <= tolerance * abs(expected)
+
+def peak_rss_mb():
+    """Peak resident set size of this process and of its largest child, in MB (None where unsupported)"""
+    try:
+        import resource
+    except ImportError:
+        return None, None
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024  # ru_maxrss is bytes on macOS, KB elsewhere
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return round(own, 1), round(children, 1)
+
+def environment():
+    """Commit, interpreter and OCR settings the results were measured with"""
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], capture_output=True, text=True, check=True,
+                                  cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    from document_processor import OCR_CONFIG, OCR_FAST_CONFIG, OCR_FAST_DPI
+    from image_preprocessing import preprocess_signature
+    from pipeline import OCR_TIERED
+    from ocr_backend import backend_name
+    try:
+        import pytesseract
+        tesseract = str(pytesseract.get_tesseract_version())
+    except Exception:
+        tesseract = None
+    return {
+        'commit': git('rev-parse', '--short', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'tesseract': tesseract,
+        'ocr_backend': backend_name(),
+        'ocr_config': OCR_CONFIG,
+        'ocr_fast_tier': f"{OCR_FAST_CONFIG} @ {OCR_FAST_DPI} dpi" if OCR_TIERED else 'off',
+        'ocr_preprocess': preprocess_signature() or 'off'
+    }
+
+def run_document(entry, extractor, ocr_workers):
+    """Run one manifest entry, returning a per-document record"""
+    from pipeline import run_pipeline
+
+    timings = {}
+    stats = {}
+    record = {'path': os.path.basename(entry['path']), 'format': entry['format'], 'type': entry['type'],
+              'pages': entry['pages']}
+    start = time.perf_counter()
+    try:
+        doc_type, income_data = run_pipeline(entry['path'], entry['mime_type'], extractor,
+                                             max_workers=ocr_workers, timings=timings, stats=stats)
+    except Exception as e:
+        record.update(error=str(e), seconds=time.perf_counter() - start)
+        return record
+    timings['total'] = time.perf_counter() - start
+    if 'ocr_tier' in stats:
+        record.update(ocr_tier=stats['ocr_tier'], ocr_escalation=stats['ocr_escalation'])
+    record.update(predicted=doc_type, timings=timings, fields={
+        field: {'expected': expected, 'actual': income_data.get(field)}
+        for field, expected in entry['expected'].items()
+    })
+    return record
+
+def report(records, elapsed, metrics_snapshot):
+    """Aggregate per-document records into the results dict"""
+    ok = [r for r in records if 'error' not in r]
+    formats = sorted({r['format'] for r in records})
+
+    latency = {'all': {stage: summarize([r['timings'][stage] for r in ok]) for stage in STAGES if ok}}
+    for fmt in formats:
+        subset = [r for r in ok if r['format'] == fmt]
+        if subset:
+            latency[fmt] = {stage: summarize([r['timings'][stage] for r in subset]) for stage in STAGES}
+
+    def share(hits, total):
+        return round(hits / total, 4) if total else None
+
+    classification = {'all': share(sum(r.get('predicted') == r['type'] for r in records), len(records))}
+    for key, values in (('by_format', formats), ('by_type', sorted({r['type'] for r in records}))):
+        field = 'format' if key == 'by_format' else 'type'
+        classification[key] = {
+            value: share(sum(r.get('predicted') == r['type'] for r in records if r[field] == value),
+                         sum(r[field] == value for r in records))
+            for value in values
+        }
+
+    checks = [
+        (r, field, field_matches(field, result['actual'], result['expected']))
+        for r in ok for field, result in r['fields'].items()
+    ]
+    extraction = {
+        'all': share(sum(hit for _, _, hit in checks), len(checks)),
+        'by_format': {fmt: share(sum(hit for r, _, hit in checks if r['format'] == fmt),
+                                 sum(r['format'] == fmt for r, _, _ in checks)) for fmt in formats},
+        'by_field': {field: share(sum(hit for _, f, hit in checks if f == field),
+                                  sum(f == field for _, f, _ in checks))
+                     for field in sorted({f for _, f, _ in checks})}
+    }
+
+    tiered = [r for r in ok if 'ocr_tier' in r]
+    reasons = sorted({r['ocr_escalation'] for r in tiered} - {None})
+    ocr_tiers = {
+        'documents': len(tiered),
+        'fast_sufficed': share(sum(r['ocr_escalation'] is None for r in tiered), len(tiered)),
+        'full_kept': share(sum(r['ocr_tier'] == 'full' for r in tiered), len(tiered)),
+        'escalations': {reason: sum(r['ocr_escalation'] == reason for r in tiered) for reason in reasons}
+    }
+
+    own_rss, child_rss = peak_rss_mb()
+    pages = sum(r['pages'] for r in records)
+    return {
+        'documents': len(records),
+        'pages': pages,
+        'errors': [{'path': r['path'], 'error': r['error']} for r in records if 'error' in r],
+        'throughput': {
+            'seconds': round(elapsed, 3),
+            'docs_per_sec': round(len(records) / elapsed, 3),
+            'pages_per_sec': round(pages / elapsed, 3)
+        },
+        'latency_ms': latency,
+        'memory': {'peak_rss_mb': own_rss, 'children_peak_rss_mb': child_rss},
+        'accuracy': {'classification': classification, 'extraction': extraction},
+        'ocr_tiers': ocr_tiers,
+        'misclassified': [
+            {'path': r['path'], 'expected': r['type'], 'predicted': r['predicted']}
+            for r in ok if r['predicted'] != r['type']
+        ],
+        'field_mismatches': [
+            {'path': r['path'], 'field': field, **r['fields'][field]}
+            for r, field, hit in checks if not hit
+        ],
+        'stages': metrics_snapshot['stages'],
+        'counters': metrics_snapshot['counters']
+    }
+
+def headline(results):
+    """Flat name -> value view of the numbers worth comparing between runs"""
+    figures = {
+        'docs/sec': results['throughput']['docs_per_sec'],
+        'pages/sec': results['throughput']['pages_per_sec'],
+        'classification accuracy': results['accuracy']['classification']['all'],
+        'extraction accuracy': results['accuracy']['extraction']['all'],
+        'peak RSS MB': results['memory']['peak_rss_mb']
+    }
+    for fmt, stages in results['latency_ms'].items():
+        figures[f'{fmt} total p50 ms'] = stages['total']['p50']
+        figures[f'{fmt} total p90 ms'] = stages['total']['p90']
+    for stage in results['stages']:
+        if stage['stage'] in ('ocr_preprocess', 'ocr_image'):
+            tier = stage['labels'].get('tier')
+            name = f"{stage['stage']} {tier} mean ms" if tier else f"{stage['stage']} mean ms"
+            figures[name] = round(stage['mean'] * 1000, 3)
+    if results.get('ocr_tiers', {}).get('documents'):
+        figures['fast OCR tier sufficed'] = results['ocr_tiers']['fast_sufficed']
+    for fmt, value in results['accuracy']['extraction']['by_format'].items():
+        figures[f'{fmt} extraction accuracy'] = value
+    return figures
+
+def print_summary(results, baseline=None):
+    current = headline(results)
+    previous = headline(baseline) if baseline else {}
+    for name, value in current.items():
+        line = f"{name:<28} {value if value is not None else '-':>12}"
+        before = previous.get(name)
+        if isinstance(before, (int, float)) and isinstance(value, (int, float)):
+            change = f" ({(value / before - 1) * 100:+.1f}%)" if before else ''
+            line += f"   was {before:>12}{change}"
+        print(line)
+    for error in results['errors']:
+        print(f"error: {error['path']}: {error['error']}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', help='corpus directory; generated there if it has no manifest.json '
+                                         '(default: a temporary directory)')
+    parser.add_argument('--output', '-o', help='write the results JSON here')
+    parser.add_argument('--compare', help='results JSON of an earlier run to print changes against')
+    parser.add_argument('--repeat', type=int, default=1, help='passes over the corpus')
+    parser.add_argument('--ocr-workers', type=int, default=1,
+                        help='OCR pool size for scanned PDFs (1 keeps OCR in-process)')
+    parser.add_argument('--ocr-cache', action='store_true', help='leave the persistent OCR cache enabled')
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+
+    # Read by document_processor at import
+    if not args.ocr_cache:
+        os.environ['OCR_CACHE_DIR'] = ''
+    logging.disable(logging.WARNING)
+    from income_extractor import IncomeExtractor
+    from metrics import METRICS
+
+    with tempfile.TemporaryDirectory() as scratch:
+        directory = args.corpus or scratch
+        if not os.path.exists(os.path.join(directory, 'manifest.json')):
+            generate_from_args(directory, args)
+        documents = load_manifest(directory)
+
+        extractor = IncomeExtractor()
+        # One untimed document per format loads PyMuPDF, Pillow and the OCR engine
+        for fmt in sorted({entry['format'] for entry in documents}):
+            run_document(next(entry for entry in documents if entry['format'] == fmt), extractor, args.ocr_workers)
+        METRICS.reset()
+
+        records = []
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            records.extend(run_document(entry, extractor, args.ocr_workers) for entry in documents)
+        elapsed = time.perf_counter() - start
+
+    results = report(records, elapsed, METRICS.snapshot())
+    results = {'environment': environment(), 'config': vars(args), **results}
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_summary(results, baseline)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
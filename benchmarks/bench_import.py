@@ -0,0 +1,58 @@
+"""Cold-start import time of the app and pipeline modules.
+
+Imports each module in a fresh interpreter several times and reports the
+median wall time, then checks that heavy optional dependencies (PDF, OCR,
+LLM client, NLTK) are not loaded until they are actually used.
+
+    python -m benchmarks.bench_import --repeat 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+MODULES = ('classifier', 'income_extractor', 'pipeline', 'helpers.get_gpt_response', 'app')
+
+# Loaded on first use only; importing any module above must not pull these in
+LAZY_MODULES = ('fitz', 'pymupdf', 'pytesseract', 'PIL.Image', 'openai', 'nltk')
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+def measure(module):
+    """Import module in a fresh interpreter; return (seconds, lazy modules it loaded)"""
+    code = PROBE.format(module=module, lazy=LAZY_MODULES)
+    output = subprocess.run(
+        [sys.executable, '-c', code], capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    return result['seconds'], result['loaded']
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--modules', nargs='+', default=list(MODULES))
+    args = parser.parse_args()
+
+    eager = {}
+    for module in args.modules:
+        timings = []
+        for _ in range(args.repeat):
+            seconds, loaded = measure(module)
+            timings.append(seconds)
+        print(f"{module:<28} {statistics.median(timings) * 1000:8.1f} ms  (min {min(timings) * 1000:.1f} ms)")
+        if loaded:
+            eager[module] = loaded
+
+    for module, loaded in eager.items():
+        print(f"{module} imports {', '.join(loaded)} eagerly")
+    assert not eager, 'heavy dependencies are loaded at import time'
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Throughput of analyze_many against the local stand-in LLM server.
+
+Starts benchmarks.stand_in_llm_server with a fixed latency and error rate,
+points the shared client at it and analyzes many applicants at once, checking
+that every request eventually succeeds and the concurrency cap holds.
+
+    python -m benchmarks.bench_llm_client --applicants 200 --concurrency 8 --error-rate 0.2
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+from benchmarks.stand_in_llm_server import StandInLLMServer
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--applicants', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.1)
+    parser.add_argument('--error-rate', type=float, default=0.2)
+    args = parser.parse_args()
+
+    server = StandInLLMServer(latency=args.latency, error_rate=args.error_rate).start()
+
+    # The client reads its settings at import
+    os.environ.update({
+        'OPENAI_BASE_URL': server.base_url,
+        'OPENAI_API_KEY': 'stand-in',
+        'LLM_MAX_CONCURRENCY': str(args.concurrency),
+        'LLM_BACKOFF_BASE': '0.05',
+        'LLM_MAX_RETRIES': '8',
+        'LLM_CACHE_DIR': ''
+    })
+    logging.disable(logging.WARNING)
+    from helpers.get_gpt_response import analyze_many
+
+    # Distinct income data per applicant
+    applicants = [
+        [{'filename': f'w2-{n}.pdf', 'type': 'W2', 'income_data': {'wages_and_tips': 50000.0 + n}}]
+        for n in range(args.applicants)
+    ]
+
+    start = time.perf_counter()
+    decisions = asyncio.run(analyze_many(applicants))
+    elapsed = time.perf_counter() - start
+
+    failed = [d for d in decisions if d.startswith(('Error', 'Unexpected error'))]
+    print(f"{args.applicants} applicants in {elapsed:.2f}s ({args.applicants / elapsed:.1f}/s)")
+    print(f"server saw {server.requests} requests, {server.errors} injected errors, "
+          f"max {server.max_in_flight} in flight (cap {args.concurrency})")
+    print(f"serial lower bound without concurrency: {args.applicants * args.latency:.2f}s")
+
+    assert not failed, f"{len(failed)} analyses failed: {failed[0]}"
+    assert server.max_in_flight <= args.concurrency, 'concurrency cap exceeded'
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
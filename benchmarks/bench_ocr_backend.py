@@ -0,0 +1,89 @@
+"""Per-image overhead of the OCR backends: resident tesserocr engine vs a tesseract process per image.
+
+Renders synthetic scanned pages, preprocesses them as the pipeline does and
+OCRs each one with both backends of ocr_backend: full pages, and the same
+pages cut into horizontal strips the way many-image PDFs embed one small
+scan per field, where the fixed cost of each call dominates. Both backends
+run the same engine on the same pixels, so the difference in mean time per
+image is the per-call overhead (process start, model load, temp files) the
+resident engine removes. Checks that both return identical text.
+
+    python -m benchmarks.bench_ocr_backend --pages 4 --strips 6
+"""
+import argparse
+import random
+import time
+
+from benchmarks.synthetic_corpus import GENERATORS, rasterize, render_text_pdf
+from document_processor import OCR_CONFIG, OCR_FAST_CONFIG
+from image_preprocessing import preprocess_for_ocr
+from ocr_backend import image_to_string
+
+BACKENDS = ('tesserocr', 'pytesseract')
+
+def make_images(pages, strips, dpi, seed):
+    """Preprocessed full-page images and the same pages cut into strips"""
+    rng = random.Random(seed)
+    generators = list(GENERATORS.values())
+    full, cut = [], []
+    for n in range(pages):
+        page_lines, _ = generators[n % len(generators)](rng, 1)
+        text_pdf = render_text_pdf(page_lines)
+        image = preprocess_for_ocr(rasterize(text_pdf[0], dpi, rng.uniform(-1, 1)), source_dpi=dpi)
+        text_pdf.close()
+        full.append(image)
+        height = image.height // strips
+        cut.extend(image.crop((0, i * height, image.width, (i + 1) * height)) for i in range(strips))
+    return {'page': full, 'strip': cut}
+
+def run(backend, images, config):
+    """OCR every image, returning (texts, seconds per image)"""
+    texts, seconds = [], []
+    for image in images:
+        start = time.perf_counter()
+        texts.append(image_to_string(image, config, backend=backend))
+        seconds.append(time.perf_counter() - start)
+    return texts, seconds
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=4)
+    parser.add_argument('--strips', type=int, default=6, help='strips each page is cut into')
+    parser.add_argument('--dpi', type=int, default=200)
+    parser.add_argument('--config', choices=('full', 'fast'), default='full', help='OCR tier config to run')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        import tesserocr  # noqa: F401
+        import pytesseract
+        tesseract = pytesseract.get_tesseract_version()
+    except Exception as e:
+        raise SystemExit(f"needs both tesserocr and the tesseract command: {e}")
+    config = OCR_CONFIG if args.config == 'full' else OCR_FAST_CONFIG
+    print(f"tesseract {tesseract}, config {config!r}")
+
+    sets = make_images(args.pages, args.strips, args.dpi, args.seed)
+    for backend in BACKENDS:
+        # The first call starts tesserocr's engine; later calls reuse it
+        start = time.perf_counter()
+        image_to_string(sets['strip'][0], config, backend=backend)
+        print(f"{backend:<12} first image {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+    results, means = {}, {}
+    for kind, images in sets.items():
+        for backend in BACKENDS:
+            texts, seconds = run(backend, images, config)
+            results[kind, backend] = texts
+            means[kind, backend] = sum(seconds) / len(seconds)
+            print(f"{backend:<12} {len(images):3d} {kind}s  {means[kind, backend] * 1000:9.1f} ms/image")
+        overhead = means[kind, 'pytesseract'] - means[kind, 'tesserocr']
+        print(f"{'':<12} per-image overhead removed on {kind}s: {overhead * 1000:.1f} ms "
+              f"({overhead / means[kind, 'pytesseract']:.0%} of the pytesseract time)")
+
+        mismatches = sum(a != b for a, b in zip(results[kind, 'tesserocr'], results[kind, 'pytesseract']))
+        assert not mismatches, f"{mismatches} {kind}s read differently by the two backends"
+        assert means[kind, 'tesserocr'] < means[kind, 'pytesseract'], f"resident engine not faster on {kind}s"
+
+if __name__ == '__main__':
+    main()
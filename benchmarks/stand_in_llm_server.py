@@ -0,0 +1,121 @@
+"""Local stand-in for the OpenAI chat-completions endpoint.
+
+Answers POST /v1/chat/completions with a canned loan decision after a fixed
+latency, and fails a share of requests with 429 or 500 so retry and
+concurrency behaviour can be exercised without network access or an API key.
+
+    python -m benchmarks.stand_in_llm_server --port 8089 --latency 0.2 --error-rate 0.2
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=test streamlit run app.py
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StandInLLMServer(ThreadingHTTPServer):
+    """Threaded HTTP server that imitates chat completions and counts what it saw"""
+
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), latency=0.1, error_rate=0.0, seed=0):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        """Serve on a background thread and return self"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def handle_error(self, request, client_address):
+        # A client that timed out has already hung up; only report real failures
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, so client connection pooling is visible
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, body, headers=()):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        server = self.server
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': f'Unknown path {self.path}'}})
+            return
+
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            fail = server.random.random() < server.error_rate
+            status = server.random.choice((429, 500)) if fail else 200
+            if fail:
+                server.errors += 1
+        try:
+            time.sleep(server.latency)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+        if status == 429:
+            self._send_json(429, {'error': {'message': 'Rate limit reached', 'type': 'rate_limit_error'}},
+                            headers=[('Retry-After', '0.05')])
+        elif status == 500:
+            self._send_json(500, {'error': {'message': 'Internal server error', 'type': 'server_error'}})
+        else:
+            self._send_json(200, {
+                'id': f"chatcmpl-{server.requests}",
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': request.get('model', 'stand-in'),
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': 'Decision: approvable (stand-in response).'},
+                    'finish_reason': 'stop'
+                }],
+                'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+            })
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.2, help='seconds per response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered with 429/500')
+    args = parser.parse_args()
+
+    server = StandInLLMServer((args.host, args.port), latency=args.latency, error_rate=args.error_rate)
+    print(f"Serving chat completions at {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
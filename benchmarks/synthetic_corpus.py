@@ -0,0 +1,305 @@
+"""Synthetic mortgage document corpus with ground truth.
+
+Renders W-2s, W-9s, paystubs and bank statements with seeded random values
+as text PDFs, scanned-image PDFs (pages rasterized, slightly skewed and
+re-embedded as JPEG) and PNGs (the first page only), and writes a
+manifest.json listing each file with its document type and the income
+fields the extractor should find.
+
+    python -m benchmarks.synthetic_corpus corpus/ --per-type 3 --pages 1 3 --formats text scan png
+"""
+import argparse
+import io
+import json
+import os
+import random
+from datetime import date, timedelta
+
+DOCUMENT_TYPES = ('W2', 'W9', 'Paystub', 'Bank Statement')
+FORMATS = ('text', 'scan', 'png')
+MIME_TYPES = {'text': 'application/pdf', 'scan': 'application/pdf', 'png': 'image/png'}
+
+# (label, periods per year, regular hours per period)
+PAY_FREQUENCIES = (
+    ('Weekly', 52, 40.0),
+    ('Biweekly', 26, 80.0),
+    ('Semi-Monthly', 24, 86.67),
+    ('Monthly', 12, 173.33)
+)
+
+EMPLOYERS = ('ACME Corp', 'Globex Industries', 'Initech LLC', 'Umbrella Health', 'Stark Logistics')
+NAMES = ('Jordan Smith', 'Alex Rivera', 'Sam Patel', 'Taylor Nguyen', 'Morgan Lee', 'Casey Johnson')
+BANKS = ('First Example Bank', 'Community Credit Union', 'Metro Savings Bank')
+
+# Letter-size pages in a monospace font, so columns survive text extraction and OCR
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+MARGIN, FONT_SIZE, LINE_HEIGHT = 54, 9.5, 14
+LINES_PER_PAGE = (PAGE_HEIGHT - 2 * MARGIN) // LINE_HEIGHT
+
+W9_INSTRUCTIONS = (
+    "General Instructions",
+    "Section references are to the Internal Revenue Code unless otherwise noted.",
+    "Purpose of Form. An individual or entity (Form W-9 requester) who is required",
+    "to file an information return with the IRS must obtain your correct taxpayer",
+    "identification number (TIN) which may be your social security number (SSN),",
+    "individual taxpayer identification number (ITIN), or employer identification",
+    "number (EIN), to report on an information return the amount paid to you.",
+    "Backup withholding. Persons making certain payments to you must under certain",
+    "conditions withhold and pay to the IRS 24% of such payments.",
+    "Exempt payee code. Generally, individuals are not exempt from backup withholding."
+)
+
+def money(value):
+    return f"{value:,.2f}"
+
+def _w2(rng, pages):
+    wages = round(rng.uniform(28000, 180000), 2)
+    deferral = round(wages * rng.choice((0, 0, 0.04, 0.06)), 2)  # 401(k), excluded from box 1 only
+    box1 = round(wages - deferral, 2)
+    year = rng.choice((2022, 2023, 2024))
+    employer, name = rng.choice(EMPLOYERS), rng.choice(NAMES)
+
+    def copy(label):
+        lines = [
+            f"Form W-2 Wage and Tax Statement {year}",
+            f"Copy {label}",
+            "a Employee's social security number      123-45-6789",
+            "b Employer identification number (EIN)   12-3456789",
+            f"c Employer's name                        {employer}",
+            f"e Employee's name                        {name}",
+            f"1 Wages, tips, other compensation        {money(box1)}",
+            f"2 Federal income tax withheld            {money(box1 * 0.12)}",
+            f"3 Social security wages                  {money(wages)}",
+            f"4 Social security tax withheld           {money(wages * 0.062)}",
+            f"5 Medicare wages and tips                {money(wages)}",
+            f"6 Medicare tax withheld                  {money(wages * 0.0145)}"
+        ]
+        if deferral:
+            lines.append(f"12a Code D                               {money(deferral)}")
+        lines.append("Department of the Treasury - Internal Revenue Service")
+        return lines
+
+    labels = ("B - To Be Filed With Employee's FEDERAL Tax Return", "C - For EMPLOYEE'S RECORDS",
+              "2 - To Be Filed With Employee's State Tax Return", "1 - For State, City, or Local Tax Department")
+    expected = {'wages_and_tips': box1, 'social_security_wages': wages, 'medicare_wages': wages}
+    return [copy(labels[n % len(labels)]) for n in range(pages)], expected
+
+def _w9(rng, pages):
+    name = rng.choice(NAMES)
+    first = [
+        "Form W-9 Request for Taxpayer Identification Number and Certification",
+        "Give form to the requester. Do not send to the IRS.",
+        f"1 Name of entity/individual   {name}",
+        "2 Business name/disregarded entity name, if different from above",
+        "3 Federal tax classification   [X] Individual/sole proprietor",
+        "4 Exemptions   Exempt payee code (if any)      FATCA reporting code (if any)",
+        f"5 Address   {rng.randint(10, 9999)} Main Street",
+        "Part I Taxpayer Identification Number (TIN)",
+        "Social security number  123-45-6789   or   Employer identification number",
+        "Part II Certification",
+        "Under penalties of perjury, I certify that the number shown on this form is",
+        "my correct taxpayer identification number and I am not subject to backup",
+        "withholding.",
+        f"Signature of U.S. person   {name}     Date {rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/2024"
+    ]
+    return [first] + [list(W9_INSTRUCTIONS) for _ in range(pages - 1)], {}
+
+def _paystub(rng, pages):
+    label, frequency, hours = rng.choice(PAY_FREQUENCIES)
+    rate = round(rng.uniform(18, 85), 2)
+    gross = round(hours * rate, 2)
+    # A pay date on a period boundary, so YTD earnings cover exactly `periods` paychecks
+    periods = rng.randint(max(2, frequency // 4), frequency)
+    year = rng.choice((2023, 2024))
+    pay_date = date(year, 1, 1) + timedelta(days=round(periods * 365 / frequency) - 1)
+    period_start = pay_date - timedelta(days=round(365 / frequency) - 1)
+    deductions = [
+        ('Federal Income Tax', 0.12), ('Social Security', 0.062), ('Medicare', 0.0145), ('State Income Tax', 0.04)
+    ]
+    net = round(gross - sum(round(gross * share, 2) for _, share in deductions), 2)
+    employer, name = rng.choice(EMPLOYERS), rng.choice(NAMES)
+
+    first = [
+        f"{employer}",
+        "Earnings Statement",
+        f"Employee: {name}        Employee ID: {rng.randint(10000, 99999)}",
+        f"Pay Period: {period_start:%m/%d/%Y} - {pay_date:%m/%d/%Y}   Pay Date: {pay_date:%m/%d/%Y}",
+        f"Pay Frequency: {label}",
+        "",
+        "Earnings              Rate      Hours       Current           YTD",
+        f"Regular Pay      {rate:>9.2f} {hours:>10.2f} {money(gross):>13} {money(gross * periods):>13}",
+        f"Gross Pay                            {money(gross):>13} {money(gross * periods):>13}",
+        "",
+        "Deductions                                  Current           YTD"
+    ]
+    for deduction, share in deductions:
+        amount = round(gross * share, 2)
+        first.append(f"{deduction:<36} {money(amount):>13} {money(amount * periods):>13}")
+    first += [
+        f"Net Pay                              {money(net):>13} {money(net * periods):>13}",
+        "",
+        f"Total YTD Earnings {money(gross * periods)}"
+    ]
+
+    # Later pages carry the pay history, oldest first
+    history = [
+        f"{pay_date - timedelta(days=round(n * 365 / frequency)):%m/%d/%Y}   {money(gross):>12}   {money(net):>12}"
+        for n in range(periods - 1, 0, -1)
+    ]
+    rest = []
+    for n in range(pages - 1):
+        chunk = history[n * 30:(n + 1) * 30] or ["No earlier pay dates in this year"]
+        rest.append(["Pay History (continued)" if n else "Pay History", "Check Date         Earnings      Deposited"] + chunk)
+
+    expected = {
+        'gross_pay': gross,
+        'net_pay': net,
+        'ytd_earnings': round(gross * periods, 2),
+        'pay_frequency': frequency,
+        'annualized_income': round(gross * frequency, 2)
+    }
+    return [first] + rest, expected
+
+def _bank_statement(rng, pages):
+    bank = rng.choice(BANKS)
+    start = date(2024, rng.randint(1, 11), 1)
+    balance = round(rng.uniform(500, 20000), 2)
+    opening = balance
+    transactions = []
+    for n in range(max(6, 40 * pages - 20)):
+        day = start + timedelta(days=n * 28 // max(6, 40 * pages - 20))
+        if rng.random() < 0.2:
+            amount = round(rng.uniform(800, 4000), 2)
+            description = f"Deposit Payroll {rng.choice(EMPLOYERS)}"
+        else:
+            amount = -round(rng.uniform(5, 400), 2)
+            description = rng.choice(('Withdrawal ATM', 'Debit Card Grocery', 'Online Transfer', 'Utility Payment'))
+        balance = round(balance + amount, 2)
+        transactions.append(f"{day:%m/%d}  {description:<34} {money(amount):>11} {money(balance):>12}")
+
+    first = [
+        f"{bank} - Checking Account Statement",
+        f"Statement Period: {start:%m/%d/%Y} - {start + timedelta(days=29):%m/%d/%Y}",
+        f"Account Number ****{rng.randint(1000, 9999)}   Routing Number 021000021",
+        f"Beginning Balance {money(opening)}      Ending Balance {money(balance)}",
+        "",
+        "Date   Description                           Amount      Balance"
+    ]
+    room = LINES_PER_PAGE - len(first)
+    pages_text = [first + transactions[:room]]
+    rest = transactions[room:]
+    while len(pages_text) < pages:
+        pages_text.append(["Transactions (continued)"] + rest[:LINES_PER_PAGE - 1])
+        rest = rest[LINES_PER_PAGE - 1:]
+    return pages_text, {}
+
+GENERATORS = {'W2': _w2, 'W9': _w9, 'Paystub': _paystub, 'Bank Statement': _bank_statement}
+
+def render_text_pdf(pages):
+    """Render pages of lines as a PDF with selectable text"""
+    import fitz
+    document = fitz.open()
+    for lines in pages:
+        page = document.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        for n, line in enumerate(lines[:LINES_PER_PAGE]):
+            if line:
+                page.insert_text((MARGIN, MARGIN + (n + 1) * LINE_HEIGHT), line, fontname='cour', fontsize=FONT_SIZE)
+    document.set_metadata({})  # No creation dates, so reruns produce the same content
+    return document
+
+def rasterize(page, dpi, skew):
+    """Grayscale PIL image of a PDF page, rotated by skew degrees like a hand-fed scan"""
+    from PIL import Image
+    pixmap = page.get_pixmap(dpi=dpi, colorspace='gray')
+    image = Image.frombytes('L', (pixmap.width, pixmap.height), pixmap.samples)
+    if skew:
+        image = image.rotate(skew, resample=Image.BICUBIC, fillcolor=255)
+    return image
+
+def render_scanned_pdf(text_pdf, dpi, skews):
+    """Rebuild a text PDF as one JPEG image per page with no selectable text"""
+    import fitz
+    document = fitz.open()
+    for page, skew in zip(text_pdf, skews):
+        buffer = io.BytesIO()
+        rasterize(page, dpi, skew).save(buffer, format='JPEG', quality=85)
+        scanned = document.new_page(width=page.rect.width, height=page.rect.height)
+        scanned.insert_image(scanned.rect, stream=buffer.getvalue())
+    document.set_metadata({})
+    return document
+
+def generate_corpus(directory, per_type=3, page_counts=(1, 3), formats=FORMATS, dpi=200, max_skew=1.0,
+                    types=DOCUMENT_TYPES, seed=0):
+    """Write the corpus under directory and return its manifest entries.
+
+    Every (type, page count, index) spec is drawn once from the seed and then
+    rendered in each format, so accuracy can be compared across formats on
+    the same content. PNGs hold the first page only.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    manifest = []
+    for doc_type in types:
+        for pages in page_counts:
+            for index in range(per_type):
+                page_lines, expected = GENERATORS[doc_type](rng, pages)
+                skews = [rng.uniform(-max_skew, max_skew) for _ in page_lines]
+                stem = f"{doc_type.lower().replace(' ', '_')}-{pages}p-{index}"
+                text_pdf = render_text_pdf(page_lines)
+                for fmt in formats:
+                    if fmt == 'text':
+                        path, page_total = f"{stem}-text.pdf", len(page_lines)
+                        text_pdf.save(os.path.join(directory, path), garbage=3, deflate=True)
+                    elif fmt == 'scan':
+                        path, page_total = f"{stem}-scan.pdf", len(page_lines)
+                        render_scanned_pdf(text_pdf, dpi, skews).save(os.path.join(directory, path), garbage=3, deflate=True)
+                    else:
+                        path, page_total = f"{stem}.png", 1
+                        rasterize(text_pdf[0], dpi, skews[0]).save(os.path.join(directory, path), format='PNG')
+                    manifest.append({
+                        'path': path,
+                        'mime_type': MIME_TYPES[fmt],
+                        'format': fmt,
+                        'type': doc_type,
+                        'pages': page_total,
+                        # Paystub and W-2 figures are all on the first page, so PNGs keep them
+                        'expected': expected
+                    })
+                text_pdf.close()
+
+    with open(os.path.join(directory, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump({'seed': seed, 'dpi': dpi, 'max_skew': max_skew, 'documents': manifest}, f, indent=2)
+    return manifest
+
+def load_manifest(directory):
+    """Return the manifest entries of a generated corpus, with absolute paths"""
+    with open(os.path.join(directory, 'manifest.json'), encoding='utf-8') as f:
+        documents = json.load(f)['documents']
+    for entry in documents:
+        entry['path'] = os.path.join(directory, entry['path'])
+    return documents
+
+def add_corpus_arguments(parser):
+    """Generator options shared with benchmarks.bench_corpus"""
+    parser.add_argument('--per-type', type=int, default=3, help='documents per type and page count')
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 3], help='page counts to generate')
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=list(FORMATS))
+    parser.add_argument('--types', nargs='+', choices=DOCUMENT_TYPES, default=list(DOCUMENT_TYPES))
+    parser.add_argument('--dpi', type=int, default=200, help='resolution of scanned pages and PNGs')
+    parser.add_argument('--max-skew', type=float, default=1.0, help='largest scan rotation in degrees')
+    parser.add_argument('--seed', type=int, default=0)
+
+def generate_from_args(directory, args):
+    return generate_corpus(directory, per_type=args.per_type, page_counts=args.pages, formats=args.formats,
+                           dpi=args.dpi, max_skew=args.max_skew, types=args.types, seed=args.seed)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('directory')
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+    manifest = generate_from_args(args.directory, args)
+    print(f"Wrote {len(manifest)} documents to {args.directory}")
+
+if __name__ == '__main__':
+    main()
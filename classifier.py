@@ -1,141 +1,223 @@
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
+import multiprocessing
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 
-# Download required NLTK data
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords')
+from normalized_document import as_document
+from metrics import METRICS
+
+# Numeric patterns, compiled once at import
+DOLLAR_AMOUNT_PATTERN = re.compile(r'\d{1,3}(?:,\d{3})*\.?\d{2}')
+DATE_PATTERN = re.compile(r'\d{1,2}[-/]\d{1,2}[-/]\d{2,4}')
+HOURS_PATTERN = re.compile(r'(?:hours?|hrs?).*?(?:worked|total).*?(?:40|80|37\.5|35)', re.IGNORECASE)
+YTD_PATTERN = re.compile(r'ytd|year.*?to.*?date|y-t-d', re.IGNORECASE)
+W2_DOLLAR_AMOUNT_PATTERN = re.compile(r'\d{1,3}(?:,\d{3})*\.\d{2}')
+SSN_PATTERN = re.compile(r'\d{3}-?\d{2}-?\d{4}|\d{4}')
+EIN_PATTERN = re.compile(r'\d{2}-\d{7}')
+BOX_NUMBER_PATTERN = re.compile(r'box\s*[1-9]|box\s*1[0-9]')
 
 def preprocess_text(text):
-    """Clean and standardize text for better matching"""
-    # Convert to lowercase and remove extra whitespace
-    text = ' '.join(text.lower().split())
-    # Remove special characters but keep hyphens and numbers
-    text = re.sub(r'[^a-z0-9\s\-\.]', '', text)
-    return text
+    """Clean and standardize text (a str or NormalizedDocument) for better matching"""
+    # Lowercased, whitespace-collapsed and stripped of special characters once per document
+    return as_document(text).preprocessed
 
 def has_payroll_numeric_patterns(text):
     """Check for numeric patterns common in payroll documents"""
     # Look for dollar amounts with optional thousands separator
-    has_dollar_amounts = bool(re.search(r'\d{1,3}(?:,\d{3})*\.?\d{2}', text))
+    has_dollar_amounts = bool(DOLLAR_AMOUNT_PATTERN.search(text))
 
     # Look for date patterns (MM/DD/YYYY or similar)
-    has_dates = bool(re.search(r'\d{1,2}[-/]\d{1,2}[-/]\d{2,4}', text))
+    has_dates = bool(DATE_PATTERN.search(text))
 
     # Look for hour-related numbers (like 40.00 or 80.00)
-    has_hours = bool(re.search(r'(?:hours?|hrs?).*?(?:worked|total).*?(?:40|80|37\.5|35)', text, re.IGNORECASE))
+    has_hours = bool(HOURS_PATTERN.search(text))
 
     # Look for YTD or year-to-date indicators
-    has_ytd = bool(re.search(r'ytd|year.*?to.*?date|y-t-d', text, re.IGNORECASE))
+    has_ytd = bool(YTD_PATTERN.search(text))
 
     return (has_dollar_amounts and has_dates) or (has_dollar_amounts and (has_hours or has_ytd))
 
 def has_w2_numeric_patterns(text):
     """Check for numeric patterns common in W2s"""
     # Look for dollar amounts with optional thousands separator
-    has_dollar_amounts = bool(re.search(r'\d{1,3}(?:,\d{3})*\.\d{2}', text))
+    has_dollar_amounts = bool(W2_DOLLAR_AMOUNT_PATTERN.search(text))
 
     # Look for SSN-like patterns (###-##-#### or last 4 digits)
-    has_ssn = bool(re.search(r'\d{3}-?\d{2}-?\d{4}|\d{4}', text))
+    has_ssn = bool(SSN_PATTERN.search(text))
 
     # Look for EIN pattern (##-#######)
-    has_ein = bool(re.search(r'\d{2}-\d{7}', text))
+    has_ein = bool(EIN_PATTERN.search(text))
 
     # Look for box references
-    has_box_numbers = bool(re.search(r'box\s*[1-9]|box\s*1[0-9]', text))
+    has_box_numbers = bool(BOX_NUMBER_PATTERN.search(text))
 
     # Return true if we see dollar amounts AND (SSN or EIN or box numbers)
     return has_dollar_amounts and (has_ssn or has_ein or has_box_numbers)
 
+# Keyword patterns for each document type: (primary, secondary)
+DOCUMENT_KEYWORDS = {
+    'W2': (
+        ('w-2', 'w2', 'wage and tax statement', 'wages and tax statement'),
+        (
+            'social security wages', 'medicare wages', 'federal income tax withheld',
+            'employer identification number', 'ein', 'employee social security number',
+            'wages tips other compensation', 'state income tax', 'local income tax',
+            'medicare tax withheld', 'allocated tips', 'dependent care benefits',
+            'box 1', 'box 2', 'box 3', 'box 4', 'box 5'
+        )
+    ),
+    'W9': (
+        ('w-9', 'w9', 'request for taxpayer identification number'),
+        (
+            'taxpayer identification number and certification',
+            'backup withholding', 'exempt payee code',
+            'fatca reporting', 'employer identification number'
+        )
+    ),
+    'Paystub': (
+        (
+            'pay stub', 'paystub', 'pay statement', 'earnings statement',
+            'pay period', 'payroll', 'period ending', 'pay date'
+        ),
+        (
+            'gross pay', 'net pay', 'year to date', 'ytd', 'deductions',
+            'federal withholding', 'hours worked', 'regular hours',
+            'earnings', 'rate', 'total gross', 'total net',
+            'federal tax', 'state tax', 'medicare', 'social security'
+        )
+    ),
+    'Bank Statement': (
+        (
+            'account statement', 'banking statement', 'bank of',
+            'checking account', 'savings account'
+        ),
+        (
+            'balance', 'withdrawal', 'deposit', 'transaction',
+            'beginning balance', 'ending balance', 'available balance',
+            'account number', 'routing number'
+        )
+    )
+}
+
+def _build_keyword_matcher(keywords):
+    """Compile keywords into one trie-shaped regex that matches, at each position,
+    the longest keyword starting there (an Aho-Corasick style single pass)"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = True  # End-of-keyword marker
+
+    def render(node):
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Greedy optional group, so the longer keyword wins
+        return '(?:' + pattern + ')?' if '' in node else pattern
+
+    return re.compile(render(trie))
+
+_ALL_KEYWORDS = tuple(sorted({keyword for tables in DOCUMENT_KEYWORDS.values() for table in tables for keyword in table}))
+KEYWORD_MATCHER = _build_keyword_matcher(_ALL_KEYWORDS)
+
+# Keywords contained in a longer keyword occur wherever the longer one does
+_IMPLIED_KEYWORDS = {
+    keyword: tuple(other for other in _ALL_KEYWORDS if other != keyword and other in keyword)
+    for keyword in _ALL_KEYWORDS
+}
+
+# Keywords that can start inside a match and run past its end; the scan resumes
+# after each match, so these may be hidden by the match they overlap
+_STRADDLING_KEYWORDS = {
+    keyword: tuple(
+        other for other in _ALL_KEYWORDS
+        if any(keyword.endswith(other[:overlap]) for overlap in range(1, min(len(keyword), len(other))))
+    )
+    for keyword in _ALL_KEYWORDS
+}
+
+@lru_cache(maxsize=256)
+def _candidate_matcher(keywords):
+    return _build_keyword_matcher(keywords)
+
+def find_keywords(text):
+    """Return the set of classifier keywords present in preprocessed text.
+
+    Gives the same result as testing `keyword in text` for every keyword, but
+    all keywords are matched in one regex scan. Keywords that could only have
+    been hidden by an overlapping match are confirmed with a scan for just
+    those candidates, which is rarely needed more than once.
+    """
+    found = set()
+    new = set(KEYWORD_MATCHER.findall(text))
+    while new:
+        found |= new
+        for keyword in new:
+            found.update(_IMPLIED_KEYWORDS[keyword])
+        candidates = {other for keyword in new for other in _STRADDLING_KEYWORDS[keyword]} - found
+        if not candidates:
+            break
+        new = set(_candidate_matcher(tuple(sorted(candidates))).findall(text)) - found
+    return found
+
+# Adjusted confidence thresholds based on document type
+MIN_CONFIDENCE = {
+    'W2': 15,  # Lower threshold for W2s due to OCR challenges
+    'W9': 40,  # Higher threshold for W9s
+    'Paystub': 20,  # Lower threshold for paystubs due to varying formats
+    'Bank Statement': 30  # Higher threshold for bank statements
+}
+DEFAULT_MIN_CONFIDENCE = 25
+
+# Batches smaller than this are classified in-process; pool startup would dominate
+PARALLEL_BATCH_SIZE = 64
+
+def calculate_weighted_score(doc_type, found, text):
+    """Calculate weighted score with primary keywords worth more"""
+    primary_patterns, secondary_patterns = DOCUMENT_KEYWORDS[doc_type]
+    primary_matches = sum(1 for p in primary_patterns if p in found)
+    secondary_matches = sum(1 for p in secondary_patterns if p in found)
+
+    # For paystubs, check for numeric patterns
+    if doc_type == 'Paystub' and secondary_matches >= 2 and has_payroll_numeric_patterns(text):
+        # If we see enough payroll-specific patterns
+        primary_matches = max(1, primary_matches)  # Ensure at least one primary match
+        secondary_matches += 2  # Boost secondary matches
+
+    # For W2s, we'll be more lenient with primary matches if we see strong numeric indicators
+    if doc_type == 'W2':
+        if has_w2_numeric_patterns(text):  # If we find strong W2 numeric patterns
+            primary_matches = max(1, primary_matches)  # Ensure at least one primary match
+            secondary_matches += 3  # Boost secondary matches significantly
+        elif secondary_matches >= 2:  # If we see enough W2-specific secondary patterns
+            primary_matches = max(1, primary_matches)  # Assume at least one primary match
+
+    if primary_matches == 0:  # For other documents, still require primary match
+        return 0, 0
+
+    weighted_score = (primary_matches * 2 + secondary_matches) / (len(primary_patterns) * 2 + len(secondary_patterns)) * 100
+
+    total_matches = primary_matches + secondary_matches
+
+    return total_matches, weighted_score
+
 # Modifying the classification thresholds and patterns for better accuracy
-def classify_document(text):
-    """Classify document based on content analysis"""
+@METRICS.timed('classify_document')
+def score_document(text):
+    """Return (matches, weighted confidence) for each document type"""
     text = preprocess_text(text)
 
-    # Define keyword patterns for each document type with primary and secondary keywords
-    w2_primary = ['w-2', 'w2', 'wage and tax statement', 'wages and tax statement']
-    w2_secondary = [
-        'social security wages', 'medicare wages', 'federal income tax withheld',
-        'employer identification number', 'ein', 'employee social security number',
-        'wages tips other compensation', 'state income tax', 'local income tax',
-        'medicare tax withheld', 'allocated tips', 'dependent care benefits',
-        'box 1', 'box 2', 'box 3', 'box 4', 'box 5'
-    ]
-
-    w9_primary = ['w-9', 'w9', 'request for taxpayer identification number']
-    w9_secondary = [
-        'taxpayer identification number and certification',
-        'backup withholding', 'exempt payee code',
-        'fatca reporting', 'employer identification number'
-    ]
-
-    paystub_primary = [
-        'pay stub', 'paystub', 'pay statement', 'earnings statement',
-        'pay period', 'payroll', 'period ending', 'pay date'
-    ]
-    paystub_secondary = [
-        'gross pay', 'net pay', 'year to date', 'ytd', 'deductions',
-        'federal withholding', 'hours worked', 'regular hours',
-        'earnings', 'rate', 'total gross', 'total net',
-        'federal tax', 'state tax', 'medicare', 'social security'
-    ]
-
-    bank_statement_primary = [
-        'account statement', 'banking statement', 'bank of', 
-        'checking account', 'savings account'
-    ]
-    bank_statement_secondary = [
-        'balance', 'withdrawal', 'deposit', 'transaction',
-        'beginning balance', 'ending balance', 'available balance',
-        'account number', 'routing number'
-    ]
-
-    def calculate_weighted_score(primary_patterns, secondary_patterns, text):
-        """Calculate weighted score with primary keywords worth more"""
-        primary_matches = sum(1 for p in primary_patterns if p in text)
-        secondary_matches = sum(1 for p in secondary_patterns if p in text)
-
-        # For paystubs, check for numeric patterns
-        is_paystub = 'pay stub' in primary_patterns or 'paystub' in primary_patterns
-        if is_paystub and has_payroll_numeric_patterns(text):
-            if secondary_matches >= 2:  # If we see enough payroll-specific patterns
-                primary_matches = max(1, primary_matches)  # Ensure at least one primary match
-                secondary_matches += 2  # Boost secondary matches
-
-        # For W2s, we'll be more lenient with primary matches if we see strong numeric indicators
-        is_w2 = 'w-2' in primary_patterns or 'w2' in primary_patterns
-        if is_w2:
-            if has_w2_numeric_patterns(text):  # If we find strong W2 numeric patterns
-                primary_matches = max(1, primary_matches)  # Ensure at least one primary match
-                secondary_matches += 3  # Boost secondary matches significantly
-            elif secondary_matches >= 2:  # If we see enough W2-specific secondary patterns
-                primary_matches = max(1, primary_matches)  # Assume at least one primary match
-
-        if primary_matches == 0:  # For other documents, still require primary match
-            return 0, 0
-
-        total_patterns = len(primary_patterns) + len(secondary_patterns)
-        weighted_score = (primary_matches * 2 + secondary_matches) / (len(primary_patterns) * 2 + len(secondary_patterns)) * 100
-
-        total_matches = primary_matches + secondary_matches
-
-        return total_matches, weighted_score
+    # All primary and secondary hits for every type come out of a single scan
+    found = find_keywords(text)
 
     # Calculate scores with weighted primary/secondary keywords
-    scores = {
-        'W2': calculate_weighted_score(w2_primary, w2_secondary, text),
-        'W9': calculate_weighted_score(w9_primary, w9_secondary, text),
-        'Paystub': calculate_weighted_score(paystub_primary, paystub_secondary, text),
-        'Bank Statement': calculate_weighted_score(bank_statement_primary, bank_statement_secondary, text),
-    }
+    return {doc_type: calculate_weighted_score(doc_type, found, text) for doc_type in DOCUMENT_KEYWORDS}
 
+def _pick_document_type(scores):
+    """Return (doc_type, confidence) for a score table, applying the type thresholds"""
     # Find document type with highest confidence
     max_confidence = 0
     doc_type = 'Unknown'
@@ -145,12 +227,47 @@ def classify_document(text):
             max_confidence = confidence
             doc_type = doc_name
 
-    # Adjusted confidence thresholds based on document type
-    min_confidence = {
-        'W2': 15,  # Lower threshold for W2s due to OCR challenges
-        'W9': 40,  # Higher threshold for W9s
-        'Paystub': 20,  # Lower threshold for paystubs due to varying formats
-        'Bank Statement': 30  # Higher threshold for bank statements
-    }.get(doc_type, 25)
+    min_confidence = MIN_CONFIDENCE.get(doc_type, DEFAULT_MIN_CONFIDENCE)
+
+    return (doc_type if max_confidence >= min_confidence else 'Unknown'), max_confidence
+
+def classify_with_confidence(text):
+    """Classify document and return (doc_type, confidence); doc_type is 'Unknown'
+    when the best confidence is below that type's threshold"""
+    return _pick_document_type(score_document(text))
+
+def classify_document(text):
+    """Classify document based on content analysis"""
+    return classify_with_confidence(text)[0]
+
+def classify_with_scores(text):
+    """Classify document and return its label, confidence and per-type confidences"""
+    scores = score_document(text)
+    doc_type, confidence = _pick_document_type(scores)
+    return {
+        'type': doc_type,
+        'confidence': confidence,
+        'scores': {doc_name: score for doc_name, (_, score) in scores.items()}
+    }
+
+def _pool_mp_context():
+    """Start classifier workers from a fork server where available, like the OCR
+    pool; forking the multi-threaded app directly can deadlock"""
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context()
+
+def classify_documents(texts, max_workers=None, chunksize=16):
+    """Classify a batch of texts, returning classify_with_scores results in input order.
+
+    Batches of at least PARALLEL_BATCH_SIZE texts are spread over a process
+    pool; smaller batches, or max_workers=1, are classified one by one
+    in-process, which costs the same as calling classify_with_scores in a loop.
+    """
+    texts = list(texts)
+    workers = (os.cpu_count() or 1) if max_workers is None else max_workers
+    if workers <= 1 or len(texts) < PARALLEL_BATCH_SIZE:
+        return [classify_with_scores(text) for text in texts]
 
-    return doc_type if max_confidence >= min_confidence else 'Unknown'
\ No newline at end of file
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_mp_context()) as executor:
+        return list(executor.map(classify_with_scores, texts, chunksize=chunksize))
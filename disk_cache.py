@@ -0,0 +1,156 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+def make_cache_key(*parts):
+    """Build a content-addressed cache key from bytes/str parts"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode('utf-8')
+        digest.update(part)
+        digest.update(b'\0')  # Separator so ("ab", "c") != ("a", "bc")
+    return digest.hexdigest()
+
+class DiskCache:
+    """Persistent on-disk key/value cache with LRU eviction under a byte budget.
+
+    Entries older than ttl seconds (if set) are treated as misses and removed.
+    A file's modification time records when it was written and its access
+    time when it was last read.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024, ttl=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> size in bytes, least recently used first
+        self._total_bytes = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def _load_index(self):
+        """Rebuild the LRU order from file access times left by previous runs"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.tmp'):
+                continue
+            try:
+                stat = os.stat(self._path(name))
+            except OSError:
+                continue
+            entries.append((max(stat.st_atime, stat.st_mtime), name, stat.st_size))
+
+        for _, name, size in sorted(entries):
+            self._entries[name] = size
+            self._total_bytes += size
+        self._evict()
+
+    def get(self, key):
+        """Return the cached bytes for key, or None on a miss"""
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path, 'rb') as f:
+                    written = os.fstat(f.fileno()).st_mtime
+                    value = f.read()
+            except OSError:
+                # Missing or removed by another process
+                self._forget(key)
+                self.misses += 1
+                return None
+
+            now = time.time()
+            if self.ttl is not None and now - written > self.ttl:
+                self._forget(key)
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+                self.misses += 1
+                return None
+
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:
+                self._entries[key] = len(value)
+                self._total_bytes += len(value)
+            try:
+                os.utime(path, (now, written))  # Persist recency for the next process that loads the index
+            except OSError:
+                pass
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Store bytes under key, evicting least recently used entries if over budget"""
+        if len(value) > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._lock:
+            try:
+                with open(tmp_path, 'wb') as f:
+                    f.write(value)
+                os.replace(tmp_path, path)  # Atomic, so readers never see partial entries
+            except OSError:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                return
+
+            self._forget(key)
+            self._entries[key] = len(value)
+            self._total_bytes += len(value)
+            self._evict()
+
+    def _forget(self, key):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.unlink(self._path(key))
+            except OSError:
+                pass
+
+    def clear(self):
+        """Remove every entry and reset the counters"""
+        with self._lock:
+            for key in list(self._entries):
+                try:
+                    os.unlink(self._path(key))
+                except OSError:
+                    pass
+            self._entries.clear()
+            self._total_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl
+            }
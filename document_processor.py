@@ -1,78 +1,410 @@
-from PIL import Image
-import pytesseract
 import io
+import os
 import re
-import fitz
+import logging
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from disk_cache import DiskCache, make_cache_key
+from normalized_document import NormalizedDocument
+from metrics import METRICS
+from image_preprocessing import OCR_PREPROCESS, preprocess_for_ocr, preprocess_signature
+from ocr_backend import image_to_string
+
+logger = logging.getLogger(__name__)
+
+# PyMuPDF, Pillow and the OCR engine are imported where they are first used, so
+# importing this module (and forking workers from it) stays cheap
 
 # TESSERACT_PATH = r"D:\Python Apps\Mortgage Approval Automation\tesseract\tesseract.exe"
 # pytesseract.pytesseract.tesseract_cmd = TESSERACT_PATH
 
+OCR_CONFIG = '--psm 3 --oem 3'
+
+# Cheap first pass for tiered OCR (see pipeline.OCR_TIERED): the page is read as
+# one block of text, without the retry on inverted text, at a lower resolution
+OCR_FAST_CONFIG = os.getenv("OCR_FAST_CONFIG") or '--psm 6 --oem 3 -c tessedit_do_invert=0'
+OCR_FAST_DPI = int(os.getenv("OCR_FAST_DPI") or 200)
+
+# Tesseract config and preprocessing target DPI per OCR tier (None keeps OCR_TARGET_DPI)
+OCR_TIERS = {
+    'fast': (OCR_FAST_CONFIG, OCR_FAST_DPI),
+    'full': (OCR_CONFIG, None)
+}
+
+# Number of worker processes used to OCR scanned PDF pages (1 disables the pool)
+OCR_WORKERS = int(os.getenv("OCR_WORKERS") or os.cpu_count() or 1)
+
+# Embedded images smaller than this many pixels (logos, icons) are not OCRed
+OCR_MIN_IMAGE_AREA = int(os.getenv("OCR_MIN_IMAGE_AREA", "10000"))
+
+# Persistent OCR result cache (set OCR_CACHE_DIR to an empty string to disable)
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "mortgage-ocr"))
+OCR_CACHE_MAX_BYTES = int(os.getenv("OCR_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+_ocr_cache = None
+_ocr_pool = None  # (executor, worker count), shared by every document
+_ocr_pool_lock = threading.Lock()
+
+def get_ocr_cache():
+    """Return the shared OCR cache, creating it on first use (None when disabled)"""
+    global _ocr_cache
+    if _ocr_cache is None and OCR_CACHE_DIR:
+        try:
+            _ocr_cache = DiskCache(OCR_CACHE_DIR, max_bytes=OCR_CACHE_MAX_BYTES)
+        except OSError:
+            return None
+    return _ocr_cache
+
+def ocr_cache_key(image_bytes, config=OCR_CONFIG, source_dpi=None, target_dpi=None):
+    """Cache key for an OCR result: hash of the image bytes, the Tesseract config and
+    the preprocessing applied, so changing either setting misses the cache"""
+    signature = preprocess_signature(source_dpi, target_dpi)
+    if not signature:
+        return make_cache_key(image_bytes, config)
+    return make_cache_key(image_bytes, config, signature)
+
+def _source_bytes(source):
+    """Return the raw bytes of a file path, bytes-like object or binary stream"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return source
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return f.read()
+    if isinstance(source, io.BytesIO):
+        return source.getvalue()  # Shares the buffer instead of copying it
+    return source.read()
+
+def _open_pdf(source):
+    """Open a PDF from a path, or from memory without touching the disk"""
+    import fitz
+    if isinstance(source, (str, os.PathLike)):
+        return fitz.open(source)
+    return fitz.open(stream=_source_bytes(source), filetype='pdf')
+
 def clean_extracted_text(text):
     """Clean extracted text by removing extra whitespace and normalizing line breaks"""
     # Remove multiple spaces and newlines
     text = re.sub(r'\s+', ' ', text)
-    # Remove non-printable characters
-    text = ''.join(char for char in text if char.isprintable() or char.isspace())
+    # Remove non-printable characters; most OCR output has none, so check before rebuilding
+    if not text.isprintable():
+        text = ''.join(char for char in text if char.isprintable() or char.isspace())
     # Print debug information
     return text.strip()
 
-def process_document(file_path, mime_type):
-    """Process document and extract text content"""
+def process_document(source, mime_type, max_workers=None, stats=None):
+    """Process document and extract text content.
+
+    source may be a file path, bytes, bytearray, memoryview or binary stream.
+    """
+    with METRICS.span('process_document', kind=document_kind(mime_type)):
+        if 'pdf' in mime_type.lower():
+            return process_pdf(source, max_workers=max_workers, stats=stats)
+        pages = iter_document_pages(source, mime_type, max_workers=max_workers)
+        return ''.join(record['content'] for record in pages)
+
+def load_document(source, mime_type, max_workers=None, stats=None, ocr_tier='full'):
+    """Process a document into a NormalizedDocument with the same text as
+    process_document, plus its lowercased copy and page offsets"""
+    try:
+        with METRICS.span('process_document', kind=document_kind(mime_type)):
+            pages = iter_document_pages(source, mime_type, max_workers=max_workers, stats=stats, ocr_tier=ocr_tier)
+            return NormalizedDocument.from_pages(record['content'] for record in pages)
+    except Exception as e:
+        # Match process_pdf, which reports PDF failures as text
+        if 'pdf' not in mime_type.lower():
+            raise
+        return NormalizedDocument(f"Error processing PDF: {str(e)}")
+
+def document_kind(mime_type):
+    """Metric label for a MIME type: 'pdf', 'image' or 'other'"""
+    mime_type = mime_type.lower()
+    return 'pdf' if 'pdf' in mime_type else 'image' if 'image' in mime_type else 'other'
+
+def iter_document_pages(source, mime_type, max_workers=None, min_image_area=None, stats=None, ocr_tier='full'):
+    """Yield per-page records as they are extracted.
+
+    Each record is a dict with 'page_number', 'source' ('text' or 'ocr'),
+    'text' (selectable text, or the OCR text of an image), 'images' (list of
+    (image number, OCR text) pairs) and 'content', the page exactly as it
+    appears in the output of process_document. ocr_tier picks the OCR_TIERS
+    entry images are read with.
+    """
     if 'pdf' in mime_type.lower():
-        return process_pdf(file_path)
+        yield from iter_pdf_pages(source, max_workers=max_workers, min_image_area=min_image_area, stats=stats,
+                                  ocr_tier=ocr_tier)
     elif 'image' in mime_type.lower():
-        return process_image(file_path)
+        text = process_image(source, ocr_tier=ocr_tier, max_workers=max_workers)
+        METRICS.inc('pages', source='ocr')
+        yield {'page_number': 1, 'source': 'ocr', 'text': text, 'images': [], 'content': text}
     else:
         raise ValueError(f"Unsupported file type: {mime_type}")
 
-def process_pdf(file_path):
-    """Extract text from all pages of a PDF, including scanned images using OCR."""
-    full_text = ""  # Store extracted text from all pages
+def _ocr_mp_context():
+    """Start OCR workers from a fork server where available; forking the caller
+    directly can deadlock when other threads (e.g. concurrent uploads) hold locks"""
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context()
+
+def get_ocr_pool(workers):
+    """Return the process pool OCR jobs run on, creating it on first use.
+
+    The pool outlives each document so its workers keep the OCR engine loaded
+    between PDFs. A request for more workers than it has replaces it; the old
+    pool finishes the jobs already queued on it and then exits.
+    """
+    with _ocr_pool_lock:
+        return _current_ocr_pool(workers)
+
+def _current_ocr_pool(workers):
+    """get_ocr_pool for callers already holding _ocr_pool_lock"""
+    global _ocr_pool
+    if _ocr_pool is None or _ocr_pool[1] < workers:
+        if _ocr_pool is not None:
+            _ocr_pool[0].shutdown(wait=False)
+        _ocr_pool = (ProcessPoolExecutor(max_workers=workers, mp_context=_ocr_mp_context()), workers)
+    return _ocr_pool[0]
+
+def shutdown_ocr_pool():
+    """Stop the OCR worker processes; the next scanned PDF starts a new pool"""
+    global _ocr_pool
+    with _ocr_pool_lock:
+        pool, _ocr_pool = _ocr_pool, None
+    if pool is not None:
+        pool[0].shutdown(wait=True, cancel_futures=True)
+
+def _submit_ocr(workers, *args):
+    """Queue _ocr_image_bytes(*args) on the shared pool, replacing it if a worker died.
+
+    Submitting under _ocr_pool_lock keeps another thread from shutting the
+    pool down (to grow or replace it) between fetching it and queueing on it.
+    """
+    global _ocr_pool
+    with _ocr_pool_lock:
+        try:
+            return _current_ocr_pool(workers).submit(_ocr_image_bytes, *args)
+        except BrokenProcessPool:
+            _ocr_pool = None
+            return _current_ocr_pool(workers).submit(_ocr_image_bytes, *args)
+
+def _ocr_image_bytes(image_bytes, source_dpi=None, ocr_tier='full'):
+    """Run Tesseract on raw image bytes, returning (text, {stage: seconds}).
+
+    Top-level so worker processes can pickle it. Metrics recorded in a worker
+    never reach the parent, so the caller passes the durations to
+    _record_ocr_durations instead.
+    """
+    from PIL import Image
+    config, target_dpi = OCR_TIERS[ocr_tier]
+    durations = {}
+    image = Image.open(io.BytesIO(image_bytes))
+    # Improve OCR accuracy with image preprocessing
+    if OCR_PREPROCESS:
+        start = time.perf_counter()
+        image = preprocess_for_ocr(image, source_dpi, target_dpi)
+        durations['ocr_preprocess'] = time.perf_counter() - start
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+    start = time.perf_counter()
+    text = image_to_string(image, config)
+    durations['ocr_image'] = time.perf_counter() - start
+    return text, durations
+
+def _record_ocr_durations(durations, ocr_tier):
+    for stage, seconds in durations.items():
+        METRICS.observe(stage, seconds, tier=ocr_tier)
+
+def _placed_dpi(page, image_item):
+    """Resolution a page.get_images(full=True) item is displayed at, or None if unknown"""
+    try:
+        bbox = page.get_image_bbox(image_item)
+    except ValueError:
+        return None
+    if bbox.is_empty or bbox.is_infinite:
+        return None
+    return max(image_item[2], image_item[3]) / (max(bbox.width, bbox.height) / 72)
+
+def _format_pdf_page(record):
+    """Render a PDF page record in the --- Page N --- / [Image i OCR Result] layout"""
+    page_number = record['page_number']
+    parts = [f"\n--- Page {page_number} ---\n", record['text'] + "\n"]
+    for image_number, image_text in record['images']:
+        parts.append(f"\n[Image {image_number} OCR Result on Page {page_number}]\n{image_text}\n")
+    return ''.join(parts)
+
+def iter_pdf_pages(source, max_workers=None, min_image_area=None, stats=None, ocr_tier='full'):
+    """Yield PDF page records in page order, OCRing scanned pages on a process pool.
+
+    Each distinct image (by xref and by content hash) is OCRed once per document
+    and images smaller than min_image_area pixels are skipped. With the shared
+    pool (get_ocr_pool), up to two pages per worker are read ahead so OCR
+    overlaps with the consumer. Pass a dict as stats to receive counts of the
+    OCR work performed and skipped.
+    """
+    workers = OCR_WORKERS if max_workers is None else max_workers
+    config, target_dpi = OCR_TIERS[ocr_tier]
+    min_area = OCR_MIN_IMAGE_AREA if min_image_area is None else min_image_area
+    lookahead = max(1, workers * 2)
+    cache = get_ocr_cache()
+    pending = deque()  # (record, [(image number, job index)]) awaiting OCR results
+    job_results = []  # Per unique image: OCR text, or a Future while it runs
+    job_keys = []
+    job_by_xref = {}
+    job_by_key = {}
+    report = {
+        'images_found': 0,
+        'images_ocr': 0,
+        'images_deduplicated': 0,
+        'images_skipped_small': 0
+    }
+
+    def store(key, image_text):
+        if cache is not None:
+            cache.set(key, image_text.encode('utf-8'))
+        return image_text
+
+    def submit(key, image_bytes, source_dpi):
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached.decode('utf-8')
+        if workers <= 1:
+            text, durations = _ocr_image_bytes(image_bytes, source_dpi, ocr_tier)
+            _record_ocr_durations(durations, ocr_tier)
+            return store(key, text)
+        return _submit_ocr(workers, image_bytes, source_dpi, ocr_tier)
+
+    def is_ready(slots):
+        return all(not isinstance(job_results[j], Future) or job_results[j].done() for _, j in slots)
+
+    def finish(record, slots):
+        for image_number, job_index in slots:
+            result = job_results[job_index]
+            if isinstance(result, Future):
+                # Time the consumer actually waits; the OCR itself runs in another process
+                with METRICS.span('ocr_wait'):
+                    text, durations = result.result()
+                _record_ocr_durations(durations, ocr_tier)
+                result = job_results[job_index] = store(job_keys[job_index], text)
+            record['images'].append((image_number, result))
+        record['content'] = _format_pdf_page(record)
+        METRICS.inc('pages', source=record['source'])
+        return record
 
     try:
         # Open the PDF using PyMuPDF (better than PyPDF2)
-        pdf_document = fitz.open(file_path)
-        
-        for page_num in range(len(pdf_document)):  # Loop through all pages
-            page = pdf_document[page_num]
-
-            
-            # Extract selectable text
-            page_text = page.get_text("text")
-
-            full_text += f"\n--- Page {page_num + 1} ---\n"
-            full_text += page_text + "\n"
-
-            # If no text was found, extract images and run OCR
-            if not page_text.strip():
-                image_list = page.get_images(full=True)
-                
-                for img_index, img in enumerate(image_list):
-                    xref = img[0]  # Get image reference
-                    base_image = pdf_document.extract_image(xref)
-                    image_bytes = base_image["image"]
-                    
-                    # Convert to PIL Image
-                    image = Image.open(io.BytesIO(image_bytes))
-                    
-                    # Run OCR on the image using Tesseract
-                    image_text = pytesseract.image_to_string(image, config='--psm 3 --oem 3')
-                    
-                    full_text += f"\n[Image {img_index + 1} OCR Result on Page {page_num + 1}]\n{image_text}\n"
+        with _open_pdf(source) as pdf_document:
+            for page_num in range(len(pdf_document)):  # Loop through all pages
+                page = pdf_document[page_num]
+
+                # Extract selectable text
+                with METRICS.span('page_text'):
+                    page_text = page.get_text("text")
+                record = {'page_number': page_num + 1, 'source': 'text', 'text': page_text, 'images': []}
+                slots = []
+
+                # If no text was found, queue the page images for OCR
+                if not page_text.strip():
+                    record['source'] = 'ocr'
+                    for img_index, img in enumerate(page.get_images(full=True)):
+                        xref, width, height = img[0], img[2], img[3]  # Image reference and size
+                        report['images_found'] += 1
 
+                        if width * height < min_area:
+                            report['images_skipped_small'] += 1
+                            continue
+
+                        job_index = job_by_xref.get(xref)
+                        if job_index is None:
+                            image_bytes = pdf_document.extract_image(xref)["image"]
+                            source_dpi = _placed_dpi(page, img) if OCR_PREPROCESS else None
+                            key = ocr_cache_key(image_bytes, config, source_dpi, target_dpi)
+
+                            # The same picture can be embedded under several xrefs
+                            job_index = job_by_key.get(key)
+                            if job_index is None:
+                                job_index = len(job_results)
+                                job_keys.append(key)
+                                job_results.append(submit(key, image_bytes, source_dpi))
+                                job_by_key[key] = job_index
+                            else:
+                                report['images_deduplicated'] += 1
+                            job_by_xref[xref] = job_index
+                        else:
+                            report['images_deduplicated'] += 1
+
+                        slots.append((img_index + 1, job_index))
+
+                pending.append((record, slots))
+
+                # Hand back finished pages in order; block once the read-ahead is full
+                while pending and (len(pending) > lookahead or is_ready(pending[0][1])):
+                    yield finish(*pending.popleft())
+
+            while pending:
+                yield finish(*pending.popleft())
+
+        if report['images_found']:
+            logger.info(
+                "OCR on %d of %d images (%d duplicates reused, %d small images skipped)",
+                len(job_results), report['images_found'],
+                report['images_deduplicated'], report['images_skipped_small']
+            )
+    finally:
+        # The consumer may stop early, so drop any queued OCR that is no longer needed
+        for result in job_results:
+            if isinstance(result, Future):
+                result.cancel()
+        METRICS.inc('ocr_images', len(job_results), outcome='unique')
+        METRICS.inc('ocr_images', report['images_deduplicated'], outcome='deduplicated')
+        METRICS.inc('ocr_images', report['images_skipped_small'], outcome='skipped_small')
+        if stats is not None:
+            report['images_ocr'] = len(job_results)
+            stats.update(report)
+
+def process_pdf(source, max_workers=None, min_image_area=None, stats=None):
+    """Extract text from all pages of a PDF, including scanned images using OCR."""
+    try:
+        pages = iter_pdf_pages(source, max_workers=max_workers, min_image_area=min_image_area, stats=stats)
+        full_text = ''.join(record['content'] for record in pages)
     except Exception as e:
         return f"Error processing PDF: {str(e)}"
     return full_text.strip()  # Return cleaned extracted text from all pages
 
-def process_image(file_path):
-    """Extract text from image using OCR"""
+def process_image(source, ocr_tier='full', max_workers=None):
+    """Extract text from image using OCR.
+
+    Like scanned PDF pages, the image is OCRed on the shared pool (get_ocr_pool)
+    unless max_workers (default OCR_WORKERS) is 1, so its workers' engines stay
+    loaded between uploads.
+    """
     try:
-        image = Image.open(file_path)
-        # Convert image to RGB if it's not
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        # Improve OCR accuracy with image preprocessing
-        text = pytesseract.image_to_string(image, config='--psm 3 --oem 3')
+        image_bytes = _source_bytes(source)
+        config, target_dpi = OCR_TIERS[ocr_tier]
+
+        # Repeat uploads skip Tesseract entirely
+        cache = get_ocr_cache()
+        if cache is not None:
+            cache_key = ocr_cache_key(image_bytes, config, target_dpi=target_dpi)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return clean_extracted_text(cached.decode('utf-8'))
+
+        workers = OCR_WORKERS if max_workers is None else max_workers
+        if workers <= 1:
+            text, durations = _ocr_image_bytes(image_bytes, ocr_tier=ocr_tier)
+        else:
+            # memoryviews can't be pickled to a worker; bytes(bytes) is not a copy
+            future = _submit_ocr(workers, bytes(image_bytes), None, ocr_tier)
+            with METRICS.span('ocr_wait'):
+                text, durations = future.result()
+        _record_ocr_durations(durations, ocr_tier)
+        if cache is not None:
+            cache.set(cache_key, text.encode('utf-8'))
         return clean_extracted_text(text)
     except Exception as e:
-        raise Exception(f"Error processing image: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Error processing image: {str(e)}")
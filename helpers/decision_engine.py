@@ -0,0 +1,140 @@
+import os
+import threading
+from statistics import median
+from income_extractor import parse_date
+
+# Annual income at or above which an application is approved locally, and at
+# or below which it is declined; anything in between goes to the model
+APPROVE_ANNUAL_INCOME = float(os.getenv("DECISION_APPROVE_INCOME") or 120000)
+DECLINE_ANNUAL_INCOME = float(os.getenv("DECISION_DECLINE_INCOME") or 25000)
+
+# Largest relative spread between income sources that still counts as agreeing
+AGREEMENT_TOLERANCE = float(os.getenv("DECISION_AGREEMENT_TOLERANCE") or 0.2)
+
+# Document types the rules know how to read income from
+INCOME_DOCUMENT_TYPES = ('W2', 'Paystub')
+
+_stats = {'decisions': 0, 'local': 0}
+_stats_lock = threading.Lock()
+
+def _spread(values):
+    """Relative spread between the largest and smallest value"""
+    return max(values) / min(values) - 1 if min(values) > 0 else float('inf')
+
+def income_sources(results):
+    """Return the annual income figures each successful W2 and paystub supports"""
+    sources = {'W2': [], 'Paystub': []}
+    for doc in results:
+        if doc.get('status') != 'success' or doc.get('type') not in INCOME_DOCUMENT_TYPES:
+            continue
+        income_data = doc.get('income_data') or {}
+        if doc['type'] == 'W2':
+            amount = income_data.get('wages_and_tips', 0)
+        else:
+            amount = income_data.get('annualized_income', 0)
+        if amount > 0:
+            sources[doc['type']].append(amount)
+    return sources
+
+def _ytd_inconsistency(paystubs):
+    """Why the paystubs' year-to-date earnings don't add up, or None.
+
+    Each paystub's YTD should be about its gross pay times the pay periods
+    elapsed by its period end, and YTD must not go down from one paystub to a
+    later one in the same year.
+    """
+    dated = []
+    for income_data in paystubs:
+        ytd = income_data.get('ytd_earnings', 0)
+        period_end = parse_date(income_data.get('period_ending') or '')
+        if ytd <= 0 or period_end is None:
+            continue
+        gross_pay = income_data.get('gross_pay', 0)
+        frequency = income_data.get('pay_frequency', 0)
+        if gross_pay > 0 and frequency > 0:
+            periods = period_end.timetuple().tm_yday * frequency / 365
+            # Allow a period either way for where the pay date falls, and the tolerance for raises
+            if abs(ytd / gross_pay - periods) > max(1, periods * AGREEMENT_TOLERANCE):
+                return "Year-to-date earnings don't match gross pay over the pay periods elapsed"
+        dated.append((period_end, ytd))
+
+    dated.sort()
+    for (earlier, earlier_ytd), (later, later_ytd) in zip(dated, dated[1:]):
+        if earlier.year == later.year and later_ytd < earlier_ytd:
+            return 'Year-to-date earnings go down between paystubs'
+    return None
+
+def _evaluate(results):
+    """Apply the rules, returning (decision, reason, annual income or None)"""
+    succeeded = [doc for doc in results if doc.get('status') == 'success']
+    if not succeeded:
+        return 'decline', 'No document could be processed, so there is no verifiable income', None
+
+    types = {doc.get('type') for doc in succeeded}
+    if types <= {'Unknown'}:
+        return 'decline', 'None of the documents was recognized as an income document', None
+
+    if any((doc.get('income_data') or {}).get('time_budget_exceeded') for doc in succeeded):
+        return 'escalate', 'Income extraction stopped early on at least one document', None
+
+    sources = income_sources(succeeded)
+    amounts = sources['W2'] + sources['Paystub']
+    if not amounts:
+        return 'escalate', 'No W2 wages or paystub income could be read', None
+
+    # Paystubs projected over the year should tell the same story
+    if len(sources['Paystub']) > 1 and _spread(sources['Paystub']) > AGREEMENT_TOLERANCE:
+        return 'escalate', 'Annualized income differs between paystubs', None
+
+    # And their year-to-date earnings should add up
+    ytd_reason = _ytd_inconsistency([doc.get('income_data') or {} for doc in succeeded if doc['type'] == 'Paystub'])
+    if ytd_reason:
+        return 'escalate', ytd_reason, None
+
+    # As should the W2 and the paystubs
+    if sources['W2'] and sources['Paystub'] and _spread([median(sources['W2']), median(sources['Paystub'])]) > AGREEMENT_TOLERANCE:
+        return 'escalate', 'W2 wages and paystub income disagree', None
+
+    annual_income = median(amounts)
+    if annual_income >= APPROVE_ANNUAL_INCOME:
+        return 'approve', f"Annual income of ${annual_income:,.2f} is well above the ${APPROVE_ANNUAL_INCOME:,.0f} threshold", annual_income
+    if annual_income <= DECLINE_ANNUAL_INCOME:
+        return 'decline', f"Annual income of ${annual_income:,.2f} is below the ${DECLINE_ANNUAL_INCOME:,.0f} minimum", annual_income
+    return 'escalate', f"Annual income of ${annual_income:,.2f} needs a closer look", annual_income
+
+def decide(results, count=True):
+    """Decide clear-cut applications locally.
+
+    Returns a dict with 'decision' ('approve', 'decline' or 'escalate'),
+    'reason', 'annual_income' and 'message'. Only 'escalate' results need
+    analyze_loan_approval. Pass count=False when re-deciding results already
+    counted, so decision_stats reflects distinct applications.
+    """
+    decision, reason, annual_income = _evaluate(results)
+    if count:
+        with _stats_lock:
+            _stats['decisions'] += 1
+            if decision != 'escalate':
+                _stats['local'] += 1
+
+    message = {
+        'approve': f"Approved. {reason}.",
+        'decline': f"Not approvable. {reason}.",
+        'escalate': reason
+    }[decision]
+    return {
+        'decision': decision,
+        'reason': reason,
+        'annual_income': annual_income,
+        'message': message
+    }
+
+def decision_stats():
+    """Return how many decisions were made and the share that avoided an LLM call"""
+    with _stats_lock:
+        decisions, local = _stats['decisions'], _stats['local']
+    return {
+        'decisions': decisions,
+        'decided_locally': local,
+        'llm_calls_avoided_pct': 100.0 * local / decisions if decisions else 0.0
+    }
@@ -1,4 +1,101 @@
+import json
+import os
+
 def extract_financial_data(results):
     """Extract only the financial data from classified documents."""
     financial_data = [doc['income_data'] for doc in results if 'income_data' in doc]
     return financial_data  # Returns a clean list of income-related data
+
+# Fields each document type contributes to the loan decision; other types
+# send their strongest detected amounts instead
+PAYLOAD_FIELDS = {
+    'W2': ('wages_and_tips', 'social_security_wages', 'medicare_wages'),
+    'Paystub': (
+        'gross_pay', 'net_pay', 'ytd_earnings', 'hours', 'rate', 'pay_frequency',
+        'period_ending', 'annualized_income', 'monthly_income'
+    )
+}
+
+# Prompt size target for the financial data, in estimated tokens
+LLM_PAYLOAD_TOKEN_BUDGET = int(os.getenv("LLM_PAYLOAD_TOKEN_BUDGET") or 1500)
+CHARS_PER_TOKEN = 4  # Rough average for English and JSON
+
+# (generic amounts per document, context characters per amount), tried in
+# order until the payload fits the budget
+PAYLOAD_LEVELS = ((5, 80), (5, 40), (3, 40), (3, 0), (1, 0))
+
+CONFIDENCE_RANK = {'high': 0, 'medium': 1, 'low': 2}
+
+def estimate_tokens(text):
+    """Rough token count for a prompt fragment"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def _round(value):
+    return round(value, 2) if isinstance(value, float) else value
+
+def context_excerpt(amount_info, context_chars):
+    """About context_chars of a detected amount's context with whitespace collapsed,
+    centred on the amount but never cut past either end of the context"""
+    context = amount_info['context']
+    # Older results have no offset; their amount sits mid-window unless the text ended nearby
+    offset = amount_info.get('context_offset', len(context) // 2)
+    before = ' '.join(context[:offset].split())
+    after = ' '.join(context[offset:].split())
+    gap = ' ' if before and context[offset - 1].isspace() else ''
+    collapsed = before + gap + after
+    start = len(before) + len(gap) - context_chars // 2
+    start = max(0, min(start, len(collapsed) - context_chars))
+    return collapsed[start:start + context_chars]
+
+def compact_income_data(doc_type, income_data, top_amounts=5, context_chars=80):
+    """Project one document's income data onto the compact schema sent to the model"""
+    entry = {'type': doc_type}
+    fields = PAYLOAD_FIELDS.get(doc_type)
+    if fields:
+        entry.update({field: _round(income_data[field]) for field in fields if field in income_data})
+    else:
+        amounts = income_data.get('potential_income_amounts') or income_data.get('detected_amounts', [])
+        strongest = sorted(amounts, key=lambda x: (CONFIDENCE_RANK.get(x['confidence'], 3), -x['amount']))
+        entry['confidence_level'] = income_data.get('confidence_level', 'low')
+        entry['highest_amount'] = _round(income_data.get('highest_amount', 0))
+        entry['amounts'] = []
+        for x in strongest[:top_amounts]:
+            amount = {'amount': _round(x['amount']), 'confidence': x['confidence']}
+            if context_chars:
+                amount['context'] = context_excerpt(x, context_chars)
+            entry['amounts'].append(amount)
+    if income_data.get('time_budget_exceeded'):
+        entry['partial'] = True
+    return entry
+
+def serialize_payload(payload):
+    """Compact, canonical JSON for a payload from build_llm_payload"""
+    return json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+
+def build_llm_payload(results, token_budget=None):
+    """Build the compact financial data for the loan prompt, returning (payload, report).
+
+    Generic documents are cut down (fewer amounts, shorter context) until the
+    serialized payload fits token_budget; W2 and paystub fields are always
+    kept. The report compares the payload with the full income data.
+    """
+    token_budget = LLM_PAYLOAD_TOKEN_BUDGET if token_budget is None else token_budget
+    documents = [(doc.get('type'), doc['income_data']) for doc in results if 'income_data' in doc]
+
+    for top_amounts, context_chars in PAYLOAD_LEVELS:
+        payload = [compact_income_data(doc_type, data, top_amounts, context_chars) for doc_type, data in documents]
+        tokens = estimate_tokens(serialize_payload(payload))
+        if tokens <= token_budget:
+            break
+
+    full_tokens = estimate_tokens(json.dumps(extract_financial_data(results), indent=2, default=str))
+    report = {
+        'documents': len(documents),
+        'estimated_tokens': tokens,
+        'full_estimated_tokens': full_tokens,
+        'token_budget': token_budget,
+        'within_budget': tokens <= token_budget,
+        'amounts_per_document': top_amounts,
+        'context_chars': context_chars
+    }
+    return payload, report
@@ -1,70 +1,171 @@
-import openai
-import json
 import asyncio
 from dotenv import load_dotenv
 import os
-from helpers.format_income import extract_financial_data 
-import json
-import asyncio
-from dotenv import load_dotenv
-import os
-
-# Load API key from .env
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-
-# Create an instance of OpenAI (async client)
-client = openai.AsyncOpenAI(api_key=OPENAI_API_KEY)
-
-async def analyze_loan_approval(results):
-    """Send financial data to GPT for loan analysis asynchronously."""
-    try:
-        # Extract only financial data
-        financial_data = extract_financial_data(results)
-
-        # Convert to JSON
-        formatted_data = json.dumps(financial_data, indent=2)
-
-        message = f"""
-        Given the following financial data extracted from multiple documents, determine if the applicant is eligible for a loan. 
-        Consider income stability, consistency, and earnings. Provide a detailed explanation.
-        Financial Data:
-        {formatted_data}
-        Based on this, is the loan approvable or not? Provide a clear decision. Don't need to give me the breakdown of the financial data. Just provide decision.
-        """
+import random
+import threading
+from helpers.format_income import build_llm_payload, serialize_payload
+from disk_cache import DiskCache, make_cache_key
+from metrics import METRICS
+import logging
 
-        response = await client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": message}],
-            temperature=0.7
-        )
-
-        return response.choices[0].message.content
-
-    except openai.OpenAIError as e:
-        return f"Error: GPT API failed - {str(e)}"
-    except Exception as e:
-        return f"Unexpected error: {str(e)}"
+logger = logging.getLogger(__name__)
 
 # Load API key from .env
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None  # Point at a compatible or stand-in server
+
+MODEL = "gpt-4-turbo"
+PROMPT_VERSION = 2  # Bump whenever the prompt changes so cached answers to the old one are not reused
+
+# Request policy shared by every analysis
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY") or 4)  # Requests in flight at once
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT") or 60)  # Seconds per attempt
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES") or 4)
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE") or 0.5)  # Seconds before the first retry
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX") or 20)
+
+# Persistent response cache; set LLM_CACHE_DIR to an empty string to disable it
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "mortgage-llm"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES") or 16 * 1024 * 1024)
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL") or 7 * 24 * 3600)  # Seconds
+
+_response_cache = None
+
+class LoanAnalysisError(Exception):
+    """The model could not be asked; the message is the error text to show"""
+
+# One client, event loop and concurrency cap for the whole process. The client's
+# connection pool belongs to the loop it runs on, so every request is sent from
+# this background loop instead of a fresh asyncio.run loop per call.
+# openai takes about half a second to import, so it is only loaded on the first request
+_client = None
+_semaphore = None
+_loop = None
+_loop_lock = threading.Lock()
+
+def get_response_cache():
+    """Return the shared loan analysis response cache, or None when disabled or unusable"""
+    global _response_cache
+    if _response_cache is None and LLM_CACHE_DIR:
+        try:
+            _response_cache = DiskCache(LLM_CACHE_DIR, max_bytes=LLM_CACHE_MAX_BYTES, ttl=LLM_CACHE_TTL)
+        except OSError:
+            return None  # e.g. a missing or read-only home directory; run uncached
+    return _response_cache
+
+def response_cache_key(financial_data, model=MODEL, prompt_version=PROMPT_VERSION):
+    """Key a response by the canonical JSON of the financial data, the model and the prompt version"""
+    return make_cache_key('loan-analysis', model, str(prompt_version), serialize_payload(financial_data))
+
+def _get_loop():
+    """Return the background event loop that owns the client, starting it on first use"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='llm-client', daemon=True).start()
+        return _loop
+
+def _get_client():
+    """Create the shared client and semaphore (called on the background loop)"""
+    global _client, _semaphore
+    if _client is None:
+        import openai
+        # Retries are handled here so they respect the concurrency cap and backoff policy
+        _client = openai.AsyncOpenAI(
+            api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL,
+            timeout=LLM_TIMEOUT, max_retries=0
+        )
+        _semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    return _client, _semaphore
 
-# Create an instance of OpenAI (async client)
-client = openai.AsyncOpenAI(api_key=OPENAI_API_KEY)
-
-async def analyze_loan_approval(results):
-    """Send financial data to GPT for loan analysis asynchronously."""
+async def _on_client_loop(coro):
+    """Run coro on the background loop, whichever loop the caller is on"""
+    loop = _get_loop()
     try:
-        # Extract only financial data
-        financial_data = extract_financial_data(results)
-
-        # Convert to JSON
-        formatted_data = json.dumps(financial_data, indent=2)
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+def _retryable_errors():
+    """Errors worth another attempt: rate limits, server errors, timeouts and dropped connections"""
+    import openai
+    return (
+        openai.RateLimitError, openai.InternalServerError,
+        openai.APITimeoutError, openai.APIConnectionError
+    )
+
+def _retry_delay(error, attempt):
+    """Seconds to wait before retry number attempt (0-based): Retry-After if the
+    server sent one, otherwise exponential backoff with full jitter"""
+    response = getattr(error, 'response', None)
+    retry_after = response.headers.get('retry-after') if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), LLM_BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+
+async def _create_completion(message):
+    """Send one chat completion, retrying retryable errors, and return its text"""
+    client, semaphore = _get_client()
+    retryable = _retryable_errors()
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            async with semaphore:
+                response = await client.chat.completions.create(
+                    model=MODEL,
+                    messages=[{"role": "user", "content": message}],
+                    temperature=0.7
+                )
+            return response.choices[0].message.content
+        except retryable as e:
+            if attempt == LLM_MAX_RETRIES:
+                raise
+            delay = _retry_delay(e, attempt)
+            METRICS.inc('llm_retries', error=type(e).__name__)
+            logger.warning("Loan analysis request failed (%s), retrying in %.2fs", type(e).__name__, delay)
+            await asyncio.sleep(delay)  # Outside the semaphore, so waiting doesn't hold a slot
+
+async def _analyze(results, use_cache=True, token_budget=None):
+    """Return (outcome, text) from _analyze_request, counting the outcome"""
+    with METRICS.span('analyze_loan_approval'):
+        outcome, content = await _analyze_request(results, use_cache, token_budget)
+    METRICS.inc('llm_requests', outcome=outcome)
+    return outcome, content
+
+async def _analyze_request(results, use_cache, token_budget):
+    """Return (outcome, text) where outcome is 'cache_hit', 'success' or 'error'"""
+    import openai
+    try:
+        # Project each document onto the fields the decision needs, within the token budget
+        financial_data, payload_report = build_llm_payload(results, token_budget)
+        logger.info("Loan analysis payload: %d estimated tokens (full income data %d, budget %d)",
+                    payload_report['estimated_tokens'], payload_report['full_estimated_tokens'],
+                    payload_report['token_budget'])
+
+        cache = get_response_cache()
+        if cache is not None:
+            cache_key = response_cache_key(financial_data)
+        if cache is not None and use_cache:
+            cached = cache.get(cache_key)
+            logger.info("Loan analysis cache %s, hit rate %.0f%%",
+                        'hit' if cached is not None else 'miss', cache.stats()['hit_rate'] * 100)
+            if cached is not None:
+                return 'cache_hit', cached.decode('utf-8')
+
+        # Convert to compact JSON
+        formatted_data = serialize_payload(financial_data)
 
         message = f"""
-        Given the following financial data extracted from multiple documents, determine if the applicant is eligible for a loan. 
+        Given the following financial data extracted from multiple documents, determine if the applicant is eligible for a loan.
         Consider income stability, consistency, and earnings. Provide a detailed explanation.
+        Generic documents list only their strongest detected amounts, with a short context excerpt.
 
         Financial Data:
         {formatted_data}
@@ -72,15 +173,39 @@ async def analyze_loan_approval(results):
         Based on this, is the loan approvable or not? Provide a clear decision.
         """
 
-        response = await client.chat.completions.create(
-            model="gpt-4-turbo",
-            messages=[{"role": "user", "content": message}],
-            temperature=0.7
-        )
-
-        return response.choices[0].message.content
+        content = await _create_completion(message)
+        if cache is not None and content:
+            # Only real answers are stored; errors below are never cached
+            cache.set(cache_key, content.encode('utf-8'))
+        return 'success', content
 
     except openai.OpenAIError as e:
-        return f"Error: GPT API failed - {str(e)}"
+        return 'error', f"Error: GPT API failed - {str(e)}"
     except Exception as e:
-        return f"Unexpected error: {str(e)}"
+        return 'error', f"Unexpected error: {str(e)}"
+
+async def analyze_loan_approval(results, use_cache=True, token_budget=None):
+    """Send financial data to GPT for loan analysis asynchronously.
+
+    Answers for financial data already analyzed with the same model and
+    prompt version come from the response cache; use_cache=False forces a
+    fresh request, whose answer then replaces the cached one. The financial
+    data is sent in the compact form from build_llm_payload. Raises
+    LoanAnalysisError when no answer could be had, so callers don't mistake
+    the error text for a decision.
+    """
+    outcome, content = await _on_client_loop(_analyze(results, use_cache, token_budget))
+    if outcome == 'error':
+        raise LoanAnalysisError(content)
+    return content
+
+async def analyze_many(applicants, use_cache=True, token_budget=None):
+    """Analyze several applicants' results at once, returning decisions in input order.
+
+    Every request shares the client's connection pool and the LLM_MAX_CONCURRENCY cap.
+    Failed analyses are returned as their error text ("Error: ...").
+    """
+    async def run_all():
+        outcomes = await asyncio.gather(*(_analyze(results, use_cache, token_budget) for results in applicants))
+        return [content for _, content in outcomes]
+    return await _on_client_loop(run_all())
@@ -0,0 +1,132 @@
+import os
+
+# Set OCR_PREPROCESS=0 to hand images to Tesseract exactly as uploaded or embedded
+OCR_PREPROCESS = os.getenv("OCR_PREPROCESS", "1") not in ("0", "false", "no")
+
+# Images are resampled to OCR_TARGET_DPI when sharper than it, or when coarser than OCR_MIN_DPI
+OCR_TARGET_DPI = int(os.getenv("OCR_TARGET_DPI") or 300)
+OCR_MIN_DPI = int(os.getenv("OCR_MIN_DPI") or 150)
+MAX_UPSCALE = 2.0
+
+# Otsu binarization, and the largest skew in degrees deskew corrects (0 turns it off)
+OCR_BINARIZE = os.getenv("OCR_BINARIZE", "1") not in ("0", "false", "no")
+OCR_MAX_SKEW = float(os.getenv("OCR_MAX_SKEW") or 5)
+
+# Without a usable resolution an image is assumed to span a US letter page
+PAGE_LONG_SIDE_INCHES = 11.0
+# Resolution tags below this are placeholders (phone photos say 72) rather than scan settings
+MIN_TRUSTED_DPI = 100
+
+# Skew search: largest long side of the working thumbnail, then coarse and fine angle steps in degrees
+SKEW_THUMBNAIL = 800
+SKEW_COARSE_STEP = 1.0
+SKEW_FINE_STEP = 0.2
+# Rotations smaller than this are left alone; Tesseract copes and rotating blurs glyphs
+MIN_DESKEW_ANGLE = 0.2
+
+def preprocess_signature(source_dpi=None, target_dpi=None):
+    """Describe the preprocessing an image gets, for OCR cache keys ('' when disabled)"""
+    if not OCR_PREPROCESS:
+        return ''
+    dpi = f"{source_dpi:.0f}" if source_dpi else 'auto'
+    target = target_dpi or OCR_TARGET_DPI
+    return f"gray;dpi={target}/{OCR_MIN_DPI}<{dpi};otsu={int(OCR_BINARIZE)};skew={OCR_MAX_SKEW:g}"
+
+def image_dpi(image, source_dpi=None):
+    """Resolution of an image: the given one (e.g. from its placement on a PDF page), its
+    resolution tag when plausible, or an estimate assuming it covers a letter page"""
+    if source_dpi:
+        return source_dpi
+    tagged = image.info.get('dpi')
+    if tagged and min(tagged) >= MIN_TRUSTED_DPI:
+        return float(min(tagged))
+    return max(image.size) / PAGE_LONG_SIDE_INCHES
+
+def resample_to_target(image, dpi, target_dpi=OCR_TARGET_DPI):
+    """Scale an image to target_dpi if it is sharper than that or coarser than OCR_MIN_DPI"""
+    from PIL import Image
+    if dpi > target_dpi * 1.1:
+        scale = target_dpi / dpi
+    elif dpi < min(OCR_MIN_DPI, target_dpi):
+        scale = min(target_dpi / dpi, MAX_UPSCALE)
+    else:
+        return image
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    if scale < 1:
+        # Box-reduce by whole factors first; Lanczos over a full phone photo costs ~10x more
+        return image.resize(size, Image.LANCZOS, reducing_gap=1.0)
+    return image.resize(size, Image.BICUBIC)
+
+def otsu_threshold(histogram):
+    """Gray level that best separates a 256-bin histogram into ink and paper"""
+    total = sum(histogram)
+    weighted_total = sum(level * count for level, count in enumerate(histogram))
+    background = weighted_background = 0
+    best_level, best_variance = 127, -1.0
+    for level, count in enumerate(histogram):
+        background += count
+        if not background:
+            continue
+        foreground = total - background
+        if not foreground:
+            break
+        weighted_background += level * count
+        mean_background = weighted_background / background
+        mean_foreground = (weighted_total - weighted_background) / foreground
+        variance = background * foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_level, best_variance = level, variance
+    return best_level
+
+def estimate_skew(image, max_skew=OCR_MAX_SKEW):
+    """Angle in degrees that makes the text lines of a grayscale image horizontal.
+
+    Rotates an inverted thumbnail through candidate angles and keeps the one
+    whose row profile (each row's mean ink) has the highest variance, i.e.
+    the sharpest alternation between text lines and the gaps between them.
+    """
+    from PIL import Image, ImageOps
+    factor = -(-max(image.size) // SKEW_THUMBNAIL)
+    ink = ImageOps.invert(image.reduce(factor))  # Rotation fills with black, which then adds no ink
+
+    def sharpness(angle):
+        rotated = ink.rotate(angle, resample=Image.NEAREST)
+        profile = rotated.resize((1, rotated.height), Image.BOX).tobytes()
+        mean = sum(profile) / len(profile)
+        return sum((value - mean) ** 2 for value in profile)
+
+    def search(center, span, step):
+        steps = int(round(span / step))
+        return max((center + n * step for n in range(-steps, steps + 1)), key=sharpness)
+
+    coarse = search(0.0, max_skew, SKEW_COARSE_STEP)
+    return search(coarse, SKEW_COARSE_STEP, SKEW_FINE_STEP)
+
+def preprocess_for_ocr(image, source_dpi=None, target_dpi=None):
+    """Grayscale, resample to target_dpi (default OCR_TARGET_DPI), binarize and deskew an image for Tesseract"""
+    from PIL import Image
+    target_dpi = target_dpi or OCR_TARGET_DPI
+    dpi = image_dpi(image, source_dpi)
+    if image.format == 'JPEG' and dpi > target_dpi * 1.1:
+        # The JPEG decoder can drop colour and scale down by up to 8x while decoding
+        width = image.width
+        scale = target_dpi / dpi
+        image.draft('L', (round(image.width * scale), round(image.height * scale)))
+        dpi *= image.width / width
+
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        # Transparent areas would otherwise turn black
+        image = Image.alpha_composite(Image.new('RGBA', image.size, 'white'), image.convert('RGBA'))
+    if image.mode != 'L':
+        image = image.convert('L')
+    image = resample_to_target(image, dpi, target_dpi)
+
+    angle = estimate_skew(image) if OCR_MAX_SKEW > 0 else 0.0
+    if OCR_BINARIZE:
+        threshold = otsu_threshold(image.histogram())
+        image = image.point(lambda value: 255 if value > threshold else 0, mode='1')
+    if abs(angle) >= MIN_DESKEW_ANGLE:
+        # A bilevel page rotates without interpolation, roughly 10x cheaper than bicubic
+        resample = Image.NEAREST if image.mode == '1' else Image.BILINEAR
+        image = image.rotate(angle, resample=resample, expand=True, fillcolor=255)
+    return image
@@ -1,102 +1,196 @@
 import re
 from typing import Dict, Optional, Union
 import logging
+import time
+from bisect import bisect_left
 from datetime import datetime
 
+from normalized_document import NormalizedDocument, as_document
+from metrics import METRICS
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class IncomeExtractor:
-    def __init__(self):
-        # W2 patterns remain unchanged
-        self.w2_patterns = {
-            'wages_and_tips': [
-                r'box\s*1.*?\$?\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
-                r'wages,?\s*tips.*?\$?\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
-                r'wages\s+and\s+tips.*?\$?\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
-                r'compensation.*?\$?\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
-                r'\$\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2}).*?box\s*1',
-                r'\$\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2}).*?wages'
-            ],
-            'social_security_wages': [
-                r'box\s*3.*?\$?\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
-                r'social\s+security\s+wages.*?\$?\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
-                r'\$\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2}).*?box\s*3',
-                r'\$\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2}).*?social security'
-            ],
-            'medicare_wages': [
-                r'box\s*5.*?\$?\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
-                r'medicare\s+wages.*?\$?\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
-                r'\$\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2}).*?box\s*5',
-                r'\$\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2}).*?medicare'
-            ]
-        }
+AMOUNT_NOISE_PATTERN = re.compile(r'[^\d.,]')
 
-        # Enhanced paystub patterns
-        self.paystub_patterns = {
-            'gross_pay': [
-                r'(?:gross|total gross|gross amount).*?(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
-                r'(?:salary|pay rate).*?(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
-                r'(?:regular).*?(?:pay|earnings).*?(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
-                r'(?:pay\s+period|period\s+pay).*?(\d{1,3}(?:,\d{3})*\.?\d{0,2})'
-            ],
-            'ytd_earnings': [
-                r'(?:ytd|year.*?to.*?date|y-t-d).*?(?:gross|earnings|pay|income).*?(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
-                r'(?:total.*?ytd|ytd.*?total).*?(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
-                r'(?:current.*?ytd|ytd.*?current).*?(\d{1,3}(?:,\d{3})*\.?\d{0,2})'
-            ],
-            'net_pay': [
-                r'(?:net\s+pay|take\s+home|net\s+amount).*?(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
-                r'(?:total\s+net|net\s+total).*?(\d{1,3}(?:,\d{3})*\.?\d{0,2})'
-            ],
-            'hours': [
-                r'(?:regular|total)\s+hours.*?(\d+\.?\d*)',
-                r'hours.*?worked.*?(\d+\.?\d*)',
-                r'(?:period|current).*?hours.*?(\d+\.?\d*)'
-            ],
-            'rate': [
-                r'(?:hourly|hour|hr)\s+rate.*?(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
-                r'rate.*?(?:per|/)\s*(?:hour|hr).*?(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
-                r'(\d{1,3}(?:,\d{3})*\.?\d{0,2}).*?(?:per|/)\s*(?:hour|hr)'
-            ]
-        }
+def parse_date(date_str: str) -> Optional[datetime]:
+    """Parse a date string as found on pay documents into a datetime, or None"""
+    try:
+        # Try different date formats
+        formats = [
+            '%m/%d/%Y', '%m-%d-%Y', '%Y-%m-%d',
+            '%m/%d/%y', '%m-%d-%y', '%y-%m-%d',
+            '%B %d, %Y', '%b %d, %Y'
+        ]
+        for fmt in formats:
+            try:
+                return datetime.strptime(date_str, fmt)
+            except ValueError:
+                continue
+        return None
+    except Exception as e:
+        logger.error("Error parsing date %s: %s", date_str, e)
+        return None
 
-        # Date patterns
-        self.date_patterns = {
-            'period_ending': [
-                r'(?:period\s+end(?:ing)?|end(?:ing)?\s+date|pay\s+date).*?(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})',
-                r'(?:period\s+end(?:ing)?|end(?:ing)?\s+date|pay\s+date).*?(\w+\s+\d{1,2},?\s*\d{4})'
-            ]
-        }
+def _compile_patterns(patterns, max_gap=None):
+    """Compile a field's alternative patterns, optionally limiting every lazy
+    `.*?` gap between a label and its amount to max_gap characters"""
+    if max_gap is not None:
+        patterns = [pattern.replace('.*?', f'.{{0,{max_gap}}}?') for pattern in patterns]
+    return tuple(re.compile(pattern) for pattern in patterns)
 
-        # Pay frequency indicators
-        self.frequency_patterns = [
-            (r'weekly|per\s+week|(?:per|/)\s*wk', 52),
-            (r'biweekly|bi-weekly|bi\s+weekly|every\s+two\s+weeks', 26),
-            (r'semi.?monthly|twice\s+per\s+month', 24),
-            (r'monthly|per\s+month|(?:per|/)\s*mo', 12),
-            (r'quarterly|per\s+quarter', 4),
-            (r'annually|annual|yearly|per\s+year|(?:per|/)\s*yr', 1)
+class IncomeExtractor:
+    # W2 patterns remain unchanged
+    w2_patterns = {
+        'wages_and_tips': [
+            r'box\s*1.*?\$?\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
+            r'wages,?\s*tips.*?\$?\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
+            r'wages\s+and\s+tips.*?\$?\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
+            r'compensation.*?\$?\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
+            r'\$\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2}).*?box\s*1',
+            r'\$\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2}).*?wages'
+        ],
+        'social_security_wages': [
+            r'box\s*3.*?\$?\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
+            r'social\s+security\s+wages.*?\$?\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
+            r'\$\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2}).*?box\s*3',
+            r'\$\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2}).*?social security'
+        ],
+        'medicare_wages': [
+            r'box\s*5.*?\$?\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
+            r'medicare\s+wages.*?\$?\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
+            r'\$\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2}).*?box\s*5',
+            r'\$\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2}).*?medicare'
         ]
+    }
+
+    # Enhanced paystub patterns
+    paystub_patterns = {
+        'gross_pay': [
+            r'(?:gross|total gross|gross amount).*?(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
+            r'(?:salary|pay rate).*?(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
+            r'(?:regular).*?(?:pay|earnings).*?(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
+            r'(?:pay\s+period|period\s+pay).*?(\d{1,3}(?:,\d{3})*\.?\d{0,2})'
+        ],
+        'ytd_earnings': [
+            r'(?:ytd|year.*?to.*?date|y-t-d).*?(?:gross|earnings|pay|income).*?(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
+            r'(?:total.*?ytd|ytd.*?total).*?(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
+            r'(?:current.*?ytd|ytd.*?current).*?(\d{1,3}(?:,\d{3})*\.?\d{0,2})'
+        ],
+        'net_pay': [
+            r'(?:net\s+pay|take\s+home|net\s+amount).*?(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
+            r'(?:total\s+net|net\s+total).*?(\d{1,3}(?:,\d{3})*\.?\d{0,2})'
+        ],
+        'hours': [
+            r'(?:regular|total)\s+hours.*?(\d+\.?\d*)',
+            r'hours.*?worked.*?(\d+\.?\d*)',
+            r'(?:period|current).*?hours.*?(\d+\.?\d*)'
+        ],
+        'rate': [
+            r'(?:hourly|hour|hr)\s+rate.*?(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
+            r'rate.*?(?:per|/)\s*(?:hour|hr).*?(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
+            r'(\d{1,3}(?:,\d{3})*\.?\d{0,2}).*?(?:per|/)\s*(?:hour|hr)'
+        ]
+    }
 
-        self.generic_patterns = {
-            'monetary_amounts': [
-                r'(?:total|amount|income|earnings|salary|pay|compensation).*?(?:[\$\:]|\:\s+)?\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
-                r'(?:biweekly|weekly|monthly|annual|quarterly|hourly).*?(?:rate|salary|pay).*?(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
-                r'(?:regular|overtime|bonus|commission).*?(?:pay|rate|hours).*?(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
-                r'\$\s*(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
-                r'(\d{1,3}(?:,\d{3})*\.?\d{0,2})\s*(?:usd|dollars|\$)',
-                r'(?:per|/)\s*(?:hour|hr|week|month|year|annum).*?(\d{1,3}(?:,\d{3})*\.?\d{0,2})',
-                r'(\d{1,3}(?:,\d{3})*\.?\d{0,2})\s*(?:per|/)\s*(?:hour|hr|week|month|year|annum)'
-            ]
-        }
+    # Date patterns
+    date_patterns = {
+        'period_ending': [
+            r'(?:period\s+end(?:ing)?|end(?:ing)?\s+date|pay\s+date).*?(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})',
+            r'(?:period\s+end(?:ing)?|end(?:ing)?\s+date|pay\s+date).*?(\w+\s+\d{1,2},?\s*\d{4})'
+        ]
+    }
+
+    # Pay frequency indicators, tried in order (biweekly before weekly, which it contains)
+    frequency_patterns = [
+        (r'biweekly|bi-weekly|bi\s+weekly|every\s+two\s+weeks', 26),
+        (r'weekly|per\s+week|(?:per|/)\s*wk', 52),
+        (r'semi.?monthly|twice\s+per\s+month', 24),
+        (r'monthly|per\s+month|(?:per|/)\s*mo', 12),
+        (r'quarterly|per\s+quarter', 4),
+        (r'annually|annual|yearly|per\s+year|(?:per|/)\s*yr', 1)
+    ]
+
+    # Every number is tokenized once; a leading $, a trailing currency/rate unit or a
+    # preceding income label marks it as a monetary amount. A trailing $ is only looked
+    # at, not consumed, since it is usually the leading $ of the next amount
+    AMOUNT_TOKEN_PATTERN = re.compile(
+        r'(?P<dollar>\$\s*)?(?<![\d.,])(?P<amount>\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?)(?![\d,])'
+        r'(?:(?P<suffix>\s*(?:usd|dollars)|\s*(?:per|/)\s*(?:hour|hr|week|month|year|annum))|(?P<dollar_after>(?=\s*\$)))?'
+    )
+    INCOME_LABEL_PATTERN = re.compile(
+        r'total|amount|income|earnings|salary|pay|compensation'
+        r'|biweekly|weekly|monthly|annual|quarterly|hourly'
+        r'|regular|overtime|bonus|commission'
+        r'|(?:per|/)\s*(?:hour|hr|week|month|year|annum)'
+    )
+
+    # Enhanced income-related keywords
+    income_keywords = {
+        'high_confidence': [
+            'salary', 'annual income', 'monthly income', 'yearly income',
+            'base pay', 'compensation', 'earnings'
+        ],
+        'medium_confidence': [
+            'payment', 'rate', 'wages', 'pay rate', 'gross', 'net',
+            'biweekly', 'weekly', 'monthly'
+        ],
+        'low_confidence': [
+            'total', 'amount', 'sum', 'payment', 'balance'
+        ]
+    }
+
+    # Compiled once per process and shared by every instance
+    _compiled_w2 = {field: _compile_patterns(patterns) for field, patterns in w2_patterns.items()}
+    _compiled_paystub = {field: _compile_patterns(patterns) for field, patterns in paystub_patterns.items()}
+    _compiled_dates = {field: _compile_patterns(patterns) for field, patterns in date_patterns.items()}
+    _compiled_frequency = tuple((re.compile(pattern), frequency) for pattern, frequency in frequency_patterns)
+    _compiled_income_keywords = {tier: _compile_patterns(map(re.escape, keywords)) for tier, keywords in income_keywords.items()}
+
+    DEFAULT_PAY_FREQUENCY = 26  # Biweekly
+
+    # Bounded-window variants, compiled once per gap size and shared
+    _bounded_tables = {}
+
+    def __init__(self, max_gap: Optional[int] = None, time_budget: Optional[float] = None):
+        """max_gap limits how many characters may separate a label from its amount
+        (None keeps unbounded matching); time_budget caps the seconds of regex
+        scanning per document, after which the remaining fields are skipped"""
+        self.max_gap = max_gap
+        self.time_budget = time_budget
+        if max_gap is not None:
+            tables = self._bounded_tables.get(max_gap)
+            if tables is None:
+                tables = self._bounded_tables[max_gap] = self._compile_bounded(max_gap)
+            self._compiled_w2, self._compiled_paystub, self._compiled_dates = tables
+
+    @classmethod
+    def _compile_bounded(cls, max_gap: int) -> tuple:
+        """Compile the W2, paystub and date tables with bounded gaps"""
+        return tuple(
+            {field: _compile_patterns(patterns, max_gap) for field, patterns in table.items()}
+            for table in (cls.w2_patterns, cls.paystub_patterns, cls.date_patterns)
+        )
+
+    def _deadline(self) -> Optional[float]:
+        """Return the perf_counter value at which this document's regex budget runs out"""
+        return time.perf_counter() + self.time_budget if self.time_budget is not None else None
+
+    @staticmethod
+    def _out_of_time(deadline: Optional[float]) -> bool:
+        return deadline is not None and time.perf_counter() > deadline
+
+    def _mark_budget_exceeded(self, result: dict) -> None:
+        """Flag a result whose extraction stopped early because of the time budget"""
+        logger.warning("Regex time budget of %ss exceeded, returning partial results", self.time_budget)
+        result['time_budget_exceeded'] = True
 
     def _clean_amount(self, amount_str: str) -> float:
         """Convert string amount to float, removing commas and handling missing decimals"""
         try:
             # Remove any non-numeric characters except dots and commas
-            cleaned = re.sub(r'[^\d.,]', '', amount_str)
+            cleaned = AMOUNT_NOISE_PATTERN.sub('', amount_str)
             cleaned = cleaned.replace(',', '')
             if '.' not in cleaned:
                 cleaned += '.00'
@@ -106,104 +200,104 @@ class IncomeExtractor:
                 cleaned += '0'
             return float(cleaned)
         except (ValueError, AttributeError) as e:
-            logger.error(f"Error converting amount {amount_str}: {str(e)}")
+            logger.error("Error converting amount %s: %s", amount_str, e)
             return 0.0
 
-    def _find_highest_amount(self, text: str, patterns: list) -> Optional[float]:
-        """Find the highest matching amount using multiple patterns"""
-        text = text.lower()
+    def _find_highest_amount(self, text: str, patterns: tuple, deadline: Optional[float] = None) -> Optional[float]:
+        """Find the highest matching amount using a field's compiled patterns (text must be lowercase)"""
         highest_amount = 0.0
 
         for pattern in patterns:
-            matches = re.finditer(pattern, text)
-            for match in matches:
-                if match and match.group(1):
-                    amount = self._clean_amount(match.group(1))
-                    if amount > highest_amount:
-                        highest_amount = amount
-                        logger.info(f"Found higher amount {amount} using pattern {pattern}")
+            if self._out_of_time(deadline):
+                break
+            # findall collects the captured amounts in C; repeats are only parsed once
+            amounts = set(pattern.findall(text))
+            amounts.discard('')
+            if not amounts:
+                continue
+            amount = max(self._clean_amount(amount_str) for amount_str in amounts)
+            if amount > highest_amount:
+                highest_amount = amount
+                logger.debug("Found higher amount %s using pattern %s", amount, pattern.pattern)
 
         return highest_amount if highest_amount > 0 else None
 
     def _detect_pay_frequency(self, text: str) -> int:
-        """Detect pay frequency and return number of pay periods per year"""
-        text = text.lower()
-        for pattern, frequency in self.frequency_patterns:
-            if re.search(pattern, text):
-                logger.info(f"Detected pay frequency: {pattern} ({frequency} periods/year)")
+        """Detect pay frequency and return number of pay periods per year (text must be lowercase)"""
+        for pattern, frequency in self._compiled_frequency:
+            if pattern.search(text):
+                logger.debug("Detected pay frequency: %s (%d periods/year)", pattern.pattern, frequency)
                 return frequency
         # Default to biweekly if no frequency detected
-        logger.info("No pay frequency detected, defaulting to biweekly (26 periods/year)")
-        return 26
+        logger.debug("No pay frequency detected, defaulting to biweekly (26 periods/year)")
+        return self.DEFAULT_PAY_FREQUENCY
 
     def _parse_date(self, date_str: str) -> Optional[datetime]:
         """Parse date string into datetime object"""
-        try:
-            # Try different date formats
-            formats = [
-                '%m/%d/%Y', '%m-%d-%Y', '%Y-%m-%d',
-                '%m/%d/%y', '%m-%d-%y', '%y-%m-%d',
-                '%B %d, %Y', '%b %d, %Y'
-            ]
-            for fmt in formats:
-                try:
-                    return datetime.strptime(date_str, fmt)
-                except ValueError:
-                    continue
-            return None
-        except Exception as e:
-            logger.error(f"Error parsing date {date_str}: {str(e)}")
-            return None
-
-    def _find_date(self, text: str, patterns: list) -> Optional[str]:
-        """Find the first matching date using multiple patterns"""
-        text = text.lower()
+        return parse_date(date_str)
+
+    def _find_date(self, text: str, patterns: tuple) -> Optional[str]:
+        """Find the first matching date using a field's compiled patterns (text must be lowercase)"""
         for pattern in patterns:
-            match = re.search(pattern, text)
+            match = pattern.search(text)
             if match and match.group(1):
-                logger.info(f"Found date: {match.group(1)}")
+                logger.debug("Found date: %s", match.group(1))
                 return match.group(1)
         return None
 
-    def extract_w2_income(self, text: str) -> Dict[str, float]:
+    @METRICS.timed('extract_w2_income')
+    def extract_w2_income(self, text: Union[str, NormalizedDocument]) -> Dict[str, float]:
         """Extract income information from W2 text"""
         logger.info("Extracting W2 income information")
         result = {}
-        logger.info(f"Processing W2 text: {text[:500]}...")
-
-        for field, patterns in self.w2_patterns.items():
-            amount = self._find_highest_amount(text, patterns)
+        document = as_document(text)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Processing W2 text: %s...", document.text[:500])
+        lowered = document.lower
+        deadline = self._deadline()
+
+        for field, patterns in self._compiled_w2.items():
+            amount = self._find_highest_amount(lowered, patterns, deadline)
             if amount is not None:
                 result[field] = amount
-                logger.info(f"Found {field}: ${amount:,.2f}")
+                logger.debug("Found %s: $%.2f", field, amount)
             else:
-                logger.warning(f"Could not find amount for {field}")
+                logger.debug("Could not find amount for %s", field)
                 result[field] = 0.0
 
+        if self._out_of_time(deadline):
+            self._mark_budget_exceeded(result)
+
         return result
 
-    def extract_paystub_income(self, text: str) -> Dict[str, Union[float, str, int]]:
+    @METRICS.timed('extract_paystub_income')
+    def extract_paystub_income(self, text: Union[str, NormalizedDocument]) -> Dict[str, Union[float, str, int]]:
         """Extract income information from paystub text including pay frequency and dates"""
         logger.info("Extracting paystub income information")
         result = {}
+        lowered = as_document(text).lower  # Shared by every field, date and frequency scan
+        deadline = self._deadline()
 
         # Extract basic amounts
-        for field, patterns in self.paystub_patterns.items():
-            amount = self._find_highest_amount(text, patterns)
+        for field, patterns in self._compiled_paystub.items():
+            amount = self._find_highest_amount(lowered, patterns, deadline)
             if amount is not None:
                 result[field] = amount
-                logger.info(f"Found {field}: {amount}")
+                logger.debug("Found %s: %s", field, amount)
             else:
-                logger.warning(f"Could not find amount for {field}")
+                logger.debug("Could not find amount for %s", field)
                 result[field] = 0.0
 
-        # Extract pay period end date
-        period_end = self._find_date(text, self.date_patterns['period_ending'])
+        # Extract pay period end date and detect pay frequency, unless the budget is spent
+        if self._out_of_time(deadline):
+            self._mark_budget_exceeded(result)
+            period_end = None
+            pay_frequency = self.DEFAULT_PAY_FREQUENCY
+        else:
+            period_end = self._find_date(lowered, self._compiled_dates['period_ending'])
+            pay_frequency = self._detect_pay_frequency(lowered)
         if period_end:
             result['period_ending'] = period_end
-
-        # Detect pay frequency
-        pay_frequency = self._detect_pay_frequency(text)
         result['pay_frequency'] = pay_frequency
 
         # Calculate annualized and monthly income
@@ -219,7 +313,7 @@ class IncomeExtractor:
         if gross_pay > 0 and pay_frequency > 0:
             annualized = gross_pay * pay_frequency
             annualized_amounts.append(('pay_frequency', annualized))
-            logger.info(f"Calculated annualized income from pay frequency: ${annualized:,.2f}")
+            logger.debug("Calculated annualized income from pay frequency: $%.2f", annualized)
 
         # Method 2: Using YTD earnings and period end date
         if ytd_earnings > 0 and period_end:
@@ -230,13 +324,13 @@ class IncomeExtractor:
                 if days_elapsed > 0:
                     annualized = (ytd_earnings / days_elapsed) * days_in_year
                     annualized_amounts.append(('ytd_projection', annualized))
-                    logger.info(f"Calculated annualized income from YTD: ${annualized:,.2f}")
+                    logger.debug("Calculated annualized income from YTD: $%.2f", annualized)
 
         # Method 3: Using hourly rate and hours
         if hours > 0 and rate > 0:
             annualized = hours * rate * 52  # Assuming consistent weekly hours
             annualized_amounts.append(('hourly_rate', annualized))
-            logger.info(f"Calculated annualized income from hourly rate: ${annualized:,.2f}")
+            logger.debug("Calculated annualized income from hourly rate: $%.2f", annualized)
 
         # Select the most reliable annualized amount
         if annualized_amounts:
@@ -249,8 +343,8 @@ class IncomeExtractor:
 
             # Calculate monthly income
             result['monthly_income'] = result['annualized_income'] / 12
-            logger.info(f"Final annualized income: ${result['annualized_income']:,.2f}")
-            logger.info(f"Monthly income: ${result['monthly_income']:,.2f}")
+            logger.info("Final annualized income: $%.2f, monthly income: $%.2f",
+                        result['annualized_income'], result['monthly_income'])
         else:
             logger.warning("Could not calculate annualized income")
             result['annualized_income'] = 0
@@ -258,7 +352,31 @@ class IncomeExtractor:
 
         return result
 
-    def extract_generic_income(self, text: str) -> Dict[str, Union[float, list]]:
+    def _keyword_positions(self, text: str) -> Dict[str, tuple]:
+        """Index where each confidence tier's keywords occur: tier -> (sorted starts, ends)"""
+        index = {}
+        for tier in ('high_confidence', 'medium_confidence'):
+            spans = sorted(
+                (match.start(), match.end())
+                for pattern in self._compiled_income_keywords[tier]
+                for match in pattern.finditer(text)
+            )
+            index[tier] = ([start for start, _ in spans], [end for _, end in spans])
+        return index
+
+    @staticmethod
+    def _has_keyword_within(positions: tuple, window_start: int, window_end: int) -> bool:
+        """True if any indexed keyword lies entirely inside text[window_start:window_end]"""
+        starts, ends = positions
+        i = bisect_left(starts, window_start)
+        while i < len(starts) and starts[i] < window_end:
+            if ends[i] <= window_end:
+                return True
+            i += 1
+        return False
+
+    @METRICS.timed('extract_generic_income')
+    def extract_generic_income(self, text: Union[str, NormalizedDocument]) -> Dict[str, Union[float, list]]:
         """Extract income information from unknown document types with improved context analysis"""
         logger.info("Extracting generic income information")
 
@@ -271,57 +389,78 @@ class IncomeExtractor:
             'confidence_level': 'low'
         }
 
-        # Enhanced income-related keywords
-        income_keywords = {
-            'high_confidence': [
-                'salary', 'annual income', 'monthly income', 'yearly income',
-                'base pay', 'compensation', 'earnings'
-            ],
-            'medium_confidence': [
-                'payment', 'rate', 'wages', 'pay rate', 'gross', 'net',
-                'biweekly', 'weekly', 'monthly'
-            ],
-            'low_confidence': [
-                'total', 'amount', 'sum', 'payment', 'balance'
-            ]
-        }
-
         # Process text to find monetary amounts with context
-        text = text.lower()
-        for field, patterns in self.generic_patterns.items():
-            for pattern in patterns:
-                matches = re.finditer(pattern, text)
-                for match in matches:
-                    if match and match.group(1):
-                        amount = self._clean_amount(match.group(1))
-                        if amount > 0:
-                            # Get surrounding context (100 characters before and after)
-                            start = max(0, match.start() - 100)
-                            end = min(len(text), match.end() + 100)
-                            context = text[start:end].strip()
-
-                            # Analyze context for income-related keywords
-                            confidence = 'low'
-                            if any(keyword in context for keyword in income_keywords['high_confidence']):
-                                confidence = 'high'
-                            elif any(keyword in context for keyword in income_keywords['medium_confidence']):
-                                confidence = 'medium'
-
-                            amount_info = {
-                                'amount': amount,
-                                'context': context,
-                                'confidence': confidence
-                            }
-
-                            result['detected_amounts'].append(amount_info)
-
-                            # Track highest amount
-                            if amount > result['highest_amount']:
-                                result['highest_amount'] = amount
-
-                            # If high or medium confidence, add to potential income amounts
-                            if confidence in ['high', 'medium']:
-                                result['potential_income_amounts'].append(amount_info)
+        document = as_document(text)
+        text = document.lower
+        deadline = self._deadline()
+
+        # One scan each for amount tokens, income labels and confidence keywords
+        keyword_positions = self._keyword_positions(text)
+        label_ends = [match.end() for match in self.INCOME_LABEL_PATTERN.finditer(text)]
+        label_index = 0
+        last_label_end = -1
+        previous_token_end = 0
+
+        for match in self.AMOUNT_TOKEN_PATTERN.finditer(text):
+            if self._out_of_time(deadline):
+                break
+
+            token_start = match.start('amount')
+            while label_index < len(label_ends) and label_ends[label_index] <= token_start:
+                last_label_end = label_ends[label_index]
+                label_index += 1
+
+            # A bare number counts when it is the first number after an income label on
+            # the same line, like the old `label.*?(amount)` patterns
+            follows_label = (
+                last_label_end >= previous_token_end
+                and document.line_of(last_label_end) == document.line_of(token_start)
+                and (self.max_gap is None or token_start - last_label_end <= self.max_gap)
+            )
+            previous_token_end = match.end()
+
+            if not (match.group('dollar') or match.group('suffix') or match.group('dollar_after') is not None
+                    or follows_label):
+                continue
+
+            amount = self._clean_amount(match.group('amount'))
+            if amount <= 0:
+                continue
+
+            # Get surrounding context (100 characters before and after)
+            start = max(0, match.start() - 100)
+            end = min(len(text), match.end() + 100)
+            window = text[start:end]
+            context = window.strip()
+            # Where the number starts within context; the window is clipped at the ends of the text
+            context_offset = match.start('amount') - start - (len(window) - len(window.lstrip()))
+
+            # Analyze context for income-related keywords
+            confidence = 'low'
+            if self._has_keyword_within(keyword_positions['high_confidence'], start, end):
+                confidence = 'high'
+            elif self._has_keyword_within(keyword_positions['medium_confidence'], start, end):
+                confidence = 'medium'
+
+            amount_info = {
+                'amount': amount,
+                'context': context,
+                'context_offset': context_offset,
+                'confidence': confidence
+            }
+
+            result['detected_amounts'].append(amount_info)
+
+            # Track highest amount
+            if amount > result['highest_amount']:
+                result['highest_amount'] = amount
+
+            # If high or medium confidence, add to potential income amounts
+            if confidence in ['high', 'medium']:
+                result['potential_income_amounts'].append(amount_info)
+
+        if self._out_of_time(deadline):
+            self._mark_budget_exceeded(result)
 
         # Update total amounts found
         result['total_amounts_found'] = len(result['detected_amounts'])
@@ -346,17 +485,17 @@ class IncomeExtractor:
             if result['potential_income_amounts']:
                 result['most_likely_income'] = result['potential_income_amounts'][0]
 
-        logger.info(f"Found {result['total_amounts_found']} amounts, "
-                    f"confidence level: {result['confidence_level']}")
+        logger.info("Found %d amounts, confidence level: %s",
+                    result['total_amounts_found'], result['confidence_level'])
 
         return result
 
-    def extract_income(self, text: str, doc_type: str) -> Dict[str, Union[float, str, int, list]]:
+    def extract_income(self, text: Union[str, NormalizedDocument], doc_type: str) -> Dict[str, Union[float, str, int, list]]:
         """Extract income based on document type"""
         if doc_type == 'W2':
             return self.extract_w2_income(text)
         elif doc_type == 'Paystub':
             return self.extract_paystub_income(text)
         else:
-            logger.info(f"Using generic extraction for document type: {doc_type}")
+            logger.debug("Using generic extraction for document type: %s", doc_type)
             return self.extract_generic_income(text)
\ No newline at end of file
@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Set METRICS_ENABLED=0 to turn every span and counter into a no-op
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") not in ("0", "false", "no")
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def _render_labels(pairs):
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+class Metrics:
+    """Thread-safe registry of stage timings and counters for the document pipeline.
+
+    Timings are kept per stage and label set as count, total and max seconds,
+    which is enough for means and a Prometheus summary without storing samples.
+    """
+
+    def __init__(self, namespace='pipeline', enabled=METRICS_ENABLED):
+        self.namespace = namespace
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._timings = {}  # (stage, labels) -> [count, total seconds, max seconds]
+        self._counters = {}  # (name, labels) -> value
+
+    def observe(self, stage, seconds, **labels):
+        """Record one duration for a stage"""
+        if not self.enabled:
+            return
+        key = (stage, _label_key(labels))
+        with self._lock:
+            timing = self._timings.get(key)
+            if timing is None:
+                self._timings[key] = [1, seconds, seconds]
+            else:
+                timing[0] += 1
+                timing[1] += seconds
+                if seconds > timing[2]:
+                    timing[2] = seconds
+
+    def inc(self, name, value=1, **labels):
+        """Add value to a counter"""
+        if not self.enabled or not value:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    @contextmanager
+    def span(self, stage, **labels):
+        """Time the enclosed block as one occurrence of stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, **labels)
+
+    def timed(self, stage, **labels):
+        """Decorator that times every call of a function as stage"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(stage, time.perf_counter() - start, **labels)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """Return {'stages': [...], 'counters': [...]} with one dict per stage/counter and label set"""
+        with self._lock:
+            timings = sorted(self._timings.items())
+            counters = sorted(self._counters.items())
+        return {
+            'stages': [
+                {'stage': stage, 'labels': dict(labels), 'count': count, 'total': total, 'max': longest,
+                 'mean': total / count}
+                for (stage, labels), (count, total, longest) in timings
+            ],
+            'counters': [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in counters
+            ]
+        }
+
+    def reset(self):
+        with self._lock:
+            self._timings.clear()
+            self._counters.clear()
+
+    def render_prometheus(self):
+        """Render every timing and counter in the Prometheus text exposition format"""
+        with self._lock:
+            timings = sorted(self._timings.items())
+            counters = sorted(self._counters.items())
+
+        stage_metric = f"{self.namespace}_stage_seconds"
+        lines = [
+            f"# HELP {stage_metric} Time spent in each pipeline stage.",
+            f"# TYPE {stage_metric} summary"
+        ]
+        max_lines = [
+            f"# HELP {stage_metric}_max Longest single occurrence of each pipeline stage.",
+            f"# TYPE {stage_metric}_max gauge"
+        ]
+        for (stage, labels), (count, total, longest) in timings:
+            rendered = _render_labels((('stage', stage),) + labels)
+            lines.append(f"{stage_metric}_count{rendered} {count}")
+            lines.append(f"{stage_metric}_sum{rendered} {total:.6f}")
+            max_lines.append(f"{stage_metric}_max{rendered} {longest:.6f}")
+        lines.extend(max_lines)
+
+        typed = set()
+        for (name, labels), value in counters:
+            metric = f"{self.namespace}_{name}_total"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_render_labels(labels)} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """Write the Prometheus text atomically, e.g. for a node_exporter textfile collector"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+# Shared by every pipeline module in the process
+METRICS = Metrics()
+
+def start_http_server(port, host='0.0.0.0', metrics=METRICS):
+    """Serve metrics.render_prometheus() at /metrics on a background thread"""
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
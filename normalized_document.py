@@ -0,0 +1,64 @@
+import re
+from bisect import bisect_right
+from functools import cached_property
+
+# Classifier matching keeps letters, digits, whitespace, hyphens and dots
+SPECIAL_CHARS_PATTERN = re.compile(r'[^a-z0-9\s\-\.]')
+
+class NormalizedDocument:
+    """Extracted document text, normalized once and shared by the classifier and extractors.
+
+    Holds the raw text, its lowercased copy and the offset where each page
+    starts; the classifier's preprocessed text and the line index are only
+    built the first time something asks for them.
+    """
+
+    def __init__(self, text, page_offsets=(0,)):
+        self.text = text
+        self.lower = text.lower()
+        self.page_offsets = tuple(page_offsets)
+
+    @classmethod
+    def from_pages(cls, pages):
+        """Build a document from page contents, stripped like process_document output"""
+        pages = list(pages)
+        offsets = []
+        position = 0
+        for page in pages:
+            offsets.append(position)
+            position += len(page)
+        joined = ''.join(pages)
+        leading = len(joined) - len(joined.lstrip())
+        text = joined.strip()
+        return cls(text, [min(max(0, offset - leading), len(text)) for offset in offsets] or [0])
+
+    def __str__(self):
+        return self.text
+
+    def __len__(self):
+        return len(self.text)
+
+    def __repr__(self):
+        return f"NormalizedDocument({len(self.text)} chars, {len(self.page_offsets)} pages)"
+
+    @cached_property
+    def preprocessed(self):
+        """Lowercased text with whitespace collapsed and special characters removed"""
+        return SPECIAL_CHARS_PATTERN.sub('', ' '.join(self.lower.split()))
+
+    @cached_property
+    def line_starts(self):
+        """Offsets where each line of the lowercased text starts"""
+        return [0] + [match.end() for match in re.finditer('\n', self.lower)]
+
+    def line_of(self, position):
+        """Zero-based line number of a character offset"""
+        return bisect_right(self.line_starts, position) - 1
+
+    def page_of(self, position):
+        """One-based page number of a character offset"""
+        return bisect_right(self.page_offsets, position)
+
+def as_document(text):
+    """Return text as a NormalizedDocument, wrapping plain strings"""
+    return text if isinstance(text, NormalizedDocument) else NormalizedDocument(text)
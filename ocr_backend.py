@@ -0,0 +1,113 @@
+import logging
+import os
+import shlex
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 'tesserocr' keeps a Tesseract engine loaded per thread through the C API,
+# 'pytesseract' starts the tesseract command for every image, and 'auto'
+# uses tesserocr when it is installed and falls back to pytesseract otherwise
+OCR_BACKEND = os.getenv("OCR_BACKEND", "auto").lower()
+OCR_LANGUAGE = 'eng'
+
+# pytesseract hands the command a temp file without a resolution, so tesseract
+# falls back to its minimum credible DPI; layout analysis depends on it
+COMMAND_SOURCE_DPI = 70
+
+# Engines are not thread-safe, so each thread keeps its own, one per config
+_local = threading.local()
+_backend = None
+_backend_lock = threading.Lock()
+
+def parse_config(config):
+    """Split a tesseract command-line config into (psm, oem, variables).
+
+    Raises ValueError for options with no C API equivalent here, which are
+    then left to the tesseract command.
+    """
+    psm, oem, variables = None, None, {}
+    args = shlex.split(config)
+    while args:
+        option = args.pop(0)
+        if option in ('--psm', '--oem', '-c', '--dpi') and not args:
+            raise ValueError(f"{option} needs a value")
+        if option == '--psm':
+            psm = int(args.pop(0))
+        elif option == '--oem':
+            oem = int(args.pop(0))
+        elif option == '--dpi':
+            variables['user_defined_dpi'] = args.pop(0)
+        elif option == '-c':
+            name, _, value = args.pop(0).partition('=')
+            variables[name] = value
+        else:
+            raise ValueError(f"Unsupported tesseract option: {option}")
+    return psm, oem, variables
+
+def _tesserocr_engine(config):
+    """This thread's initialized engine for config, created on first use"""
+    engines = getattr(_local, 'engines', None)
+    if engines is None:
+        engines = _local.engines = {}
+    api = engines.get(config)
+    if api is None:
+        import tesserocr
+        psm, oem, variables = parse_config(config)
+        kwargs = {'lang': OCR_LANGUAGE, 'variables': variables}
+        if os.getenv('TESSDATA_PREFIX'):
+            kwargs['path'] = os.environ['TESSDATA_PREFIX']
+        if psm is not None:
+            kwargs['psm'] = psm
+        if oem is not None:
+            kwargs['oem'] = oem
+        api = engines[config] = tesserocr.PyTessBaseAPI(**kwargs)
+    return api
+
+def _pytesseract_to_string(image, config):
+    import pytesseract
+    return pytesseract.image_to_string(image, config=config)
+
+def _select_backend():
+    """Resolve OCR_BACKEND to 'tesserocr' or 'pytesseract' once per process"""
+    if OCR_BACKEND == 'pytesseract':
+        return 'pytesseract'
+    try:
+        import tesserocr  # noqa: F401
+    except ImportError:
+        if OCR_BACKEND == 'tesserocr':
+            logger.warning("OCR_BACKEND=tesserocr but tesserocr is not installed; using pytesseract")
+        return 'pytesseract'
+    return 'tesserocr'
+
+def backend_name():
+    """The backend image_to_string uses in this process"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _select_backend()
+    return _backend
+
+def image_to_string(image, config='', backend=None):
+    """OCR a PIL image, returning the same text as pytesseract.image_to_string.
+
+    backend overrides the configured one ('tesserocr' or 'pytesseract').
+    """
+    global _backend
+    if (backend or backend_name()) == 'tesserocr':
+        try:
+            api = _tesserocr_engine(config)
+        except ValueError:
+            api = None  # Options only the tesseract command understands
+        except RuntimeError as e:
+            # Missing language data or a broken install; later images go straight to pytesseract
+            logger.warning("Could not start tesserocr (%s); falling back to pytesseract", e)
+            _backend = 'pytesseract'
+            api = None
+        if api is not None:
+            api.SetImage(image)
+            api.SetSourceResolution(COMMAND_SOURCE_DPI)
+            # The tesseract command ends each page of text output with page_separator (a form feed)
+            return api.GetUTF8Text() + api.GetVariableAsString('page_separator')
+    return _pytesseract_to_string(image, config)
@@ -0,0 +1,204 @@
+import io
+import os
+import threading
+import time
+from document_processor import document_kind, iter_document_pages, load_document
+from classifier import DEFAULT_MIN_CONFIDENCE, MIN_CONFIDENCE, classify_document, classify_with_confidence
+from normalized_document import NormalizedDocument
+from metrics import METRICS
+
+# Pages each extractor reads once the document type is known (None reads everything)
+EXTRACTOR_PAGES = {
+    'W2': 2,  # Copies B/C/2 of the form repeat the same boxes
+    'W9': 1,
+    'Paystub': 2,  # Earnings, deductions and YTD fit on the first page or two
+    'Bank Statement': 3,  # Account summary and first transactions
+    'Unknown': None
+}
+
+# Stop re-classifying after this many pages and fall back to the whole document
+MAX_CLASSIFY_PAGES = 5
+
+# OCR scanned documents with the fast tier first and redo them with the full
+# pass only when the result looks doubtful (set OCR_TIERED=0 to always run it)
+OCR_TIERED = os.getenv("OCR_TIERED", "1") not in ("0", "false", "no")
+# Points above a type's confidence threshold a fast-tier classification must clear
+OCR_CONFIDENCE_MARGIN = float(os.getenv("OCR_CONFIDENCE_MARGIN") or 10)
+
+# Fields a fast-tier extraction must find (non-zero) to be trusted
+REQUIRED_FIELDS = {
+    'W2': ('wages_and_tips',),
+    'Paystub': ('gross_pay', 'annualized_income')
+}
+
+_tier_stats = {'documents': 0, 'fast': 0}
+_tier_stats_lock = threading.Lock()
+
+def process_and_classify(source, mime_type, progressive=True, max_workers=None, stats=None, ocr_tier='full'):
+    """Extract text and classify a document, returning (NormalizedDocument, doc_type).
+
+    In progressive mode the document is classified after each page; once the
+    confidence clears the type threshold, only the pages the chosen extractor
+    needs (EXTRACTOR_PAGES) are read and the rest are never extracted or OCRed.
+    A stats dict also receives the pages read and OCRed and the confidence.
+    """
+    if not progressive:
+        document = load_document(source, mime_type, max_workers=max_workers, stats=stats, ocr_tier=ocr_tier)
+        return document, classify_document(document)
+
+    parts = []
+    ocr_pages = 0
+    doc_type = None
+    confidence = 0.0
+    pages_needed = None
+    pages = iter_document_pages(source, mime_type, max_workers=max_workers, stats=stats, ocr_tier=ocr_tier)
+    # Only time spent producing pages counts as process_document; classification is timed on its own
+    processing = 0.0
+    try:
+        start = time.perf_counter()
+        for record in pages:
+            processing += time.perf_counter() - start
+            parts.append(record['content'])
+            ocr_pages += record['source'] == 'ocr'
+
+            if doc_type is None and len(parts) <= MAX_CLASSIFY_PAGES:
+                label, label_confidence = classify_with_confidence(''.join(parts))
+                if label != 'Unknown':
+                    doc_type, confidence = label, label_confidence
+                    pages_needed = EXTRACTOR_PAGES.get(doc_type)
+
+            if doc_type is not None and pages_needed is not None and len(parts) >= pages_needed:
+                break
+            start = time.perf_counter()
+        else:
+            processing += time.perf_counter() - start
+    except Exception as e:
+        # Match process_pdf, which reports PDF failures as text
+        if 'pdf' not in mime_type.lower():
+            raise
+        document = NormalizedDocument(f"Error processing PDF: {str(e)}")
+        return document, classify_document(document)
+    finally:
+        pages.close()  # Cancels read-ahead OCR for pages we no longer need
+        METRICS.observe('process_document', processing, kind=document_kind(mime_type))
+
+    document = NormalizedDocument.from_pages(parts)
+    if doc_type is None:
+        doc_type, confidence = classify_with_confidence(document)
+    if stats is not None:
+        stats.update(pages_read=len(parts), pages_ocr=ocr_pages, confidence=confidence)
+    return document, doc_type
+
+def ocr_escalation_reason(doc_type, confidence, income_data):
+    """Why a fast-tier OCR result should be redone with the full pass, or None if it can be trusted"""
+    if doc_type == 'Unknown':
+        return 'unknown_type'
+    if confidence < MIN_CONFIDENCE.get(doc_type, DEFAULT_MIN_CONFIDENCE) + OCR_CONFIDENCE_MARGIN:
+        return 'low_confidence'
+    if not all(income_data.get(field) for field in REQUIRED_FIELDS.get(doc_type, ())):
+        return 'missing_fields'
+    return None
+
+def _result_quality(result):
+    """Sort key for pass results: a known type, then fewer missing required fields, then confidence"""
+    missing = sum(not result['income_data'].get(field) for field in REQUIRED_FIELDS.get(result['doc_type'], ()))
+    return result['doc_type'] != 'Unknown', -missing, result['confidence']
+
+def _run_tiered(run_pass, source, stats=None):
+    """Call run_pass(source, ocr_tier) with the fast OCR tier and, if its result is
+    doubtful, again with the full tier, returning the better of the two results.
+
+    run_pass returns a dict with 'doc_type', 'confidence', 'income_data' and
+    'ocr_pages'; documents with no OCRed pages never need the second pass.
+    """
+    if not OCR_TIERED:
+        return run_pass(source, 'full')
+    if hasattr(source, 'read') and not isinstance(source, io.BytesIO):
+        source = source.read()  # The full pass has to read the file again
+
+    result = run_pass(source, 'fast')
+    if not result['ocr_pages']:
+        return result
+    reason = ocr_escalation_reason(result['doc_type'], result['confidence'], result['income_data'])
+    tier = 'fast'
+    if reason is not None:
+        full = run_pass(source, 'full')
+        # The full pass is not always better; psm 3 can split a form's columns apart
+        if _result_quality(full) >= _result_quality(result):
+            result, tier = full, 'full'
+
+    with _tier_stats_lock:
+        _tier_stats['documents'] += 1
+        if reason is None:
+            _tier_stats['fast'] += 1
+    if reason is None:
+        METRICS.inc('ocr_tier_documents', outcome='fast_sufficed')
+    else:
+        METRICS.inc('ocr_tier_documents', outcome='escalated', reason=reason)
+    if stats is not None:
+        stats.update(ocr_tier=tier, ocr_escalation=reason)
+    return result
+
+def ocr_tier_stats():
+    """Return how many documents were OCRed with tiering and the share the fast tier sufficed for"""
+    with _tier_stats_lock:
+        documents, fast = _tier_stats['documents'], _tier_stats['fast']
+    return {
+        'documents': documents,
+        'fast_sufficed': fast,
+        'escalated': documents - fast,
+        'fast_sufficed_pct': 100.0 * fast / documents if documents else 0.0
+    }
+
+def analyze_document(source, mime_type, extractor, max_workers=None, stats=None):
+    """Progressively process, classify and extract income from one document with
+    tiered OCR, returning (NormalizedDocument, doc_type, income_data)"""
+    def run_pass(source, ocr_tier):
+        pass_stats = {}
+        document, doc_type = process_and_classify(source, mime_type, max_workers=max_workers, stats=pass_stats,
+                                                  ocr_tier=ocr_tier)
+        return {
+            'document': document,
+            'doc_type': doc_type,
+            'confidence': pass_stats.get('confidence', 0.0),
+            'ocr_pages': pass_stats.get('pages_ocr', 0),
+            'income_data': extractor.extract_income(document, doc_type)
+        }
+
+    result = _run_tiered(run_pass, source, stats)
+    return result['document'], result['doc_type'], result['income_data']
+
+def run_pipeline(source, mime_type, extractor, max_workers=None, timings=None, stats=None):
+    """Process, classify and extract income from one document, returning (doc_type, income_data).
+
+    Unlike process_document, unreadable files raise instead of returning the
+    error as text. Stage durations in seconds are recorded under 'process',
+    'classify' and 'extract' when a timings dict is passed, summed over both
+    OCR passes when the fast tier is escalated. A stats dict receives the OCR
+    tier used ('ocr_tier') and why it was escalated ('ocr_escalation').
+    """
+    if timings is not None:
+        timings.update(process=0.0, classify=0.0, extract=0.0)
+
+    def run_pass(source, ocr_tier):
+        start = time.perf_counter()
+        with METRICS.span('process_document', kind=document_kind(mime_type)):
+            pages = list(iter_document_pages(source, mime_type, max_workers=max_workers, ocr_tier=ocr_tier))
+            document = NormalizedDocument.from_pages(record['content'] for record in pages)
+        processed = time.perf_counter()
+        doc_type, confidence = classify_with_confidence(document)
+        classified = time.perf_counter()
+        income_data = extractor.extract_income(document, doc_type)
+        if timings is not None:
+            timings['process'] += processed - start
+            timings['classify'] += classified - processed
+            timings['extract'] += time.perf_counter() - classified
+        return {
+            'doc_type': doc_type,
+            'confidence': confidence,
+            'ocr_pages': sum(record['source'] == 'ocr' for record in pages),
+            'income_data': income_data
+        }
+
+    result = _run_tiered(run_pass, source, stats)
+    return result['doc_type'], result['income_data']
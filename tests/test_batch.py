@@ -0,0 +1,25 @@
+"""Resuming a batch run from its JSONL output"""
+import json
+
+from batch import load_done, read_records
+
+def write_output(path, records, tail=''):
+    path.write_text(''.join(json.dumps(record) + '\n' for record in records) + tail, encoding='utf-8')
+
+def test_latest_record_per_path_wins(tmp_path):
+    output = tmp_path / 'results.jsonl'
+    write_output(output, [
+        {'path': 'a.pdf', 'status': 'error', 'message': 'timeout'},
+        {'path': 'b.pdf', 'status': 'success'},
+        {'path': 'c.pdf', 'status': 'error', 'message': 'unreadable'},
+        {'path': 'a.pdf', 'status': 'success'},  # Appended by --retry-errors
+    ], tail='{"path": "d.pdf", "sta')  # Cut off mid-record
+    records = read_records(str(output))
+    assert list(records) == ['a.pdf', 'b.pdf', 'c.pdf']
+    assert records['a.pdf']['status'] == 'success'
+    assert load_done(str(output)) == {'a.pdf', 'b.pdf', 'c.pdf'}
+    assert load_done(str(output), retry_errors=True) == {'a.pdf', 'b.pdf'}
+
+def test_missing_output_has_nothing_done(tmp_path):
+    assert read_records(str(tmp_path / 'missing.jsonl')) == {}
+    assert load_done(str(tmp_path / 'missing.jsonl'), retry_errors=True) == set()
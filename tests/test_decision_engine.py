@@ -0,0 +1,57 @@
+"""Local approve/decline/escalate rules of the decision engine"""
+import pytest
+
+from helpers import decision_engine
+from helpers.decision_engine import APPROVE_ANNUAL_INCOME, DECLINE_ANNUAL_INCOME, decide, decision_stats
+
+def w2(wages):
+    return {'status': 'success', 'type': 'W2', 'income_data': {'wages_and_tips': wages}}
+
+def paystub(annualized, **extra):
+    return {'status': 'success', 'type': 'Paystub', 'income_data': {'annualized_income': annualized, **extra}}
+
+def ytd(period_ending, ytd_earnings, gross_pay=6000.0, pay_frequency=26):
+    return {'period_ending': period_ending, 'ytd_earnings': ytd_earnings, 'gross_pay': gross_pay,
+            'pay_frequency': pay_frequency}
+
+FAILED = {'status': 'error', 'type': 'unknown', 'message': 'unreadable'}
+UNKNOWN = {'status': 'success', 'type': 'Unknown', 'income_data': {'highest_amount': 500000.0}}
+W9 = {'status': 'success', 'type': 'W9', 'income_data': {}}
+
+CASES = [
+    # (description, results, decision, annual income)
+    ('no documents', [], 'decline', None),
+    ('every document failed', [FAILED, FAILED], 'decline', None),
+    ('all Unknown', [UNKNOWN, UNKNOWN], 'decline', None),
+    ('time budget hit', [w2(200000.0), paystub(200000.0, time_budget_exceeded=True)], 'escalate', None),
+    ('no readable income', [W9, w2(0.0)], 'escalate', None),
+    ('paystubs disagree', [paystub(150000.0), paystub(200000.0)], 'escalate', None),
+    ('paystubs agree', [paystub(150000.0), paystub(160000.0)], 'approve', 155000.0),
+    ('paystub YTD matches gross pay', [paystub(156000.0, **ytd('07/01/2024', 78000.0))], 'approve', 156000.0),
+    ('paystub YTD short of gross pay', [paystub(156000.0, **ytd('07/01/2024', 30000.0))], 'escalate', None),
+    ('paystub YTD goes down', [paystub(156000.0, **ytd('03/01/2024', 30000.0)),
+                               paystub(156000.0, **ytd('03/15/2024', 27000.0))], 'escalate', None),
+    ('paystub YTD resets with the year', [paystub(156000.0, **ytd('12/20/2023', 150000.0)),
+                                          paystub(156000.0, **ytd('01/12/2024', 6000.0))], 'approve', 156000.0),
+    ('W2 and paystubs disagree', [w2(150000.0), paystub(200000.0)], 'escalate', None),
+    ('W2 and paystub agree', [w2(150000.0), paystub(160000.0), UNKNOWN], 'approve', 155000.0),
+    ('approve boundary', [w2(APPROVE_ANNUAL_INCOME)], 'approve', APPROVE_ANNUAL_INCOME),
+    ('just below approve', [w2(APPROVE_ANNUAL_INCOME - 0.01)], 'escalate', APPROVE_ANNUAL_INCOME - 0.01),
+    ('decline boundary', [w2(DECLINE_ANNUAL_INCOME)], 'decline', DECLINE_ANNUAL_INCOME),
+    ('just above decline', [w2(DECLINE_ANNUAL_INCOME + 0.01)], 'escalate', DECLINE_ANNUAL_INCOME + 0.01),
+    ('failed uploads are ignored', [FAILED, w2(20000.0)], 'decline', 20000.0),
+]
+
+@pytest.mark.parametrize('description, results, expected, annual_income', CASES, ids=[c[0] for c in CASES])
+def test_rules(description, results, expected, annual_income):
+    decision = decide(results, count=False)
+    assert decision['decision'] == expected
+    assert decision['annual_income'] == annual_income
+    assert decision['message']
+
+def test_stats_count_only_counted_decisions(monkeypatch):
+    monkeypatch.setattr(decision_engine, '_stats', {'decisions': 0, 'local': 0})
+    decide([w2(200000.0)])
+    decide([w2(200000.0)], count=False)  # A rerun over the same results
+    decide([w2(80000.0)])
+    assert decision_stats() == {'decisions': 2, 'decided_locally': 1, 'llm_calls_avoided_pct': 50.0}
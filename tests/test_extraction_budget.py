@@ -0,0 +1,27 @@
+"""Worst-case IncomeExtractor latency stays bounded on adversarial OCR text"""
+import logging
+
+import pytest
+
+from benchmarks.bench_adversarial_extraction import adversarial_text, worst_case
+from income_extractor import IncomeExtractor
+
+MAX_GAP = 120
+BUDGET = 0.25
+
+@pytest.fixture(autouse=True)
+def quiet_logging():
+    logging.disable(logging.WARNING)
+    yield
+    logging.disable(logging.NOTSET)
+
+def test_bounded_extraction_holds_time_budget():
+    text = adversarial_text(pages=40)
+    doc_type, elapsed = worst_case(IncomeExtractor(max_gap=MAX_GAP, time_budget=BUDGET), text)
+    # The budget is checked between pattern scans, so allow one bounded scan of overrun
+    assert elapsed <= BUDGET * 2 + 0.5, f"{doc_type} extraction took {elapsed:.3f}s"
+
+def test_bounded_extraction_still_reads_labelled_amounts():
+    extractor = IncomeExtractor(max_gap=MAX_GAP, time_budget=BUDGET)
+    text = adversarial_text(pages=5) + ' Wages, tips, other compensation $52,000.00 ' + adversarial_text(pages=5, seed=1)
+    assert extractor.extract_income(text, 'W2')['wages_and_tips'] == 52000.0
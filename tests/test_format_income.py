@@ -0,0 +1,22 @@
+"""Context excerpts sent to the model keep the amount they describe"""
+import logging
+
+import pytest
+
+from helpers.format_income import context_excerpt
+from income_extractor import IncomeExtractor
+
+FILLER = 'lorem ipsum dolor sit amet consectetur adipiscing elit ' * 5
+
+@pytest.mark.parametrize('text, amount', [
+    ('$1,234.56 salary deposit ' + FILLER, '$1,234.56'),
+    (FILLER + ' total income $9,876.54', '$9,876.54'),
+    (FILLER + '  annual   salary $55,000.00 paid  ' + FILLER, '$55,000.00'),
+])
+@pytest.mark.parametrize('context_chars', [40, 80])
+def test_excerpt_contains_amount(text, amount, context_chars):
+    logging.disable(logging.WARNING)
+    detected = IncomeExtractor().extract_generic_income(text)['detected_amounts']
+    excerpt = context_excerpt(detected[0], context_chars)
+    assert amount in excerpt
+    assert len(excerpt) <= context_chars
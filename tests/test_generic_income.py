@@ -0,0 +1,36 @@
+"""Generic income amounts on statement-style lines match the pattern-per-field extractor
+this tokenizer replaced (which listed an amount once per pattern that matched it)"""
+import logging
+
+import pytest
+
+from income_extractor import IncomeExtractor
+
+# (text, distinct amounts the old extractor found, its highest_amount)
+STATEMENT_LINES = [
+    ("Check 1043 $250.00\nCheck 1044 $1,875.25", [250.0, 1043.0, 1044.0, 1875.25], 1875.25),
+    ("01/15 $1,250.00 deposit", [15.0, 1250.0], 1250.0),
+    ("Box 1 $ 52,000.00", [1.0, 52000.0], 52000.0),
+    ("01/02 Direct Deposit ACME Payroll $2,450.00 Balance $5,120.33", [2450.0, 5120.33], 5120.33),
+    ("01/09 ATM Withdrawal $200.00 $4,920.33", [200.0, 4920.33], 4920.33),
+    ("Opening balance $3,000.00 Closing balance $4,120.10", [3000.0, 4120.1], 4120.1),
+    ("Total deposits 12 $14,300.00", [12.0, 14300.0], 14300.0),
+    ("Earnings 2,000.00$ bonus 500$", [500.0, 2000.0], 2000.0),
+    ("Salary 85,000 per year", [85000.0], 85000.0),
+    ("Hourly rate 32.50/hr, 40 hours", [32.5, 40.0], 40.0),
+    ("Monthly income: 6,500.00 USD", [6500.0], 6500.0),
+    ("Net pay 1,980.44 dollars deposited 01/31", [1980.44], 1980.44),
+    ("Statement period 01/01/2024 - 01/31/2024 Account 123456789", [], 0),
+]
+
+@pytest.fixture(scope='module')
+def extractor():
+    logging.disable(logging.WARNING)
+    yield IncomeExtractor()
+    logging.disable(logging.NOTSET)
+
+@pytest.mark.parametrize('text, amounts, highest', STATEMENT_LINES)
+def test_generic_amounts_match_previous_extractor(extractor, text, amounts, highest):
+    result = extractor.extract_generic_income(text)
+    assert sorted(item['amount'] for item in result['detected_amounts']) == amounts
+    assert result['highest_amount'] == highest
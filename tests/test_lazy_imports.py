@@ -0,0 +1,9 @@
+"""Importing the app and pipeline modules does not load heavy optional dependencies"""
+import pytest
+
+from benchmarks.bench_import import MODULES, measure
+
+@pytest.mark.parametrize('module', MODULES)
+def test_heavy_dependencies_load_lazily(module):
+    _, loaded = measure(module)
+    assert not loaded, f"{module} imports {', '.join(loaded)} eagerly"
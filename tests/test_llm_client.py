@@ -0,0 +1,73 @@
+"""The shared LLM client's retries, per-attempt timeout and concurrency cap, against the stand-in server"""
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.stand_in_llm_server import StandInLLMServer
+from helpers import get_gpt_response
+from helpers.get_gpt_response import LoanAnalysisError, analyze_loan_approval, analyze_many
+
+CONCURRENCY = 3
+MAX_RETRIES = 2
+
+@pytest.fixture(autouse=True)
+def quiet_logging():
+    logging.disable(logging.WARNING)
+    yield
+    logging.disable(logging.NOTSET)
+
+@pytest.fixture
+def serve(monkeypatch):
+    """Start a stand-in server and point a fresh client at it (settings are read at import)"""
+    servers = []
+
+    def start(**kwargs):
+        server = StandInLLMServer(**kwargs).start()
+        servers.append(server)
+        for name, value in {
+            'OPENAI_BASE_URL': server.base_url,
+            'OPENAI_API_KEY': 'stand-in',
+            'LLM_MAX_CONCURRENCY': CONCURRENCY,
+            'LLM_TIMEOUT': 0.2,
+            'LLM_MAX_RETRIES': MAX_RETRIES,
+            'LLM_BACKOFF_BASE': 0.01,
+            'LLM_CACHE_DIR': '',
+            '_response_cache': None,
+            '_client': None,
+            '_semaphore': None
+        }.items():
+            monkeypatch.setattr(get_gpt_response, name, value)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def applicants(count):
+    return [[{'filename': f'w2-{n}.pdf', 'type': 'W2', 'income_data': {'wages_and_tips': 50000.0 + n}}]
+            for n in range(count)]
+
+def test_retries_injected_errors_within_concurrency_cap(serve, monkeypatch):
+    monkeypatch.setattr(get_gpt_response, 'LLM_MAX_RETRIES', 8)
+    server = serve(latency=0.03, error_rate=0.3)
+    decisions = asyncio.run(analyze_many(applicants(12)))
+    assert server.errors, 'no errors were injected'
+    assert not [d for d in decisions if d.startswith(('Error', 'Unexpected error'))]
+    assert server.requests == len(decisions) + server.errors
+    assert server.max_in_flight <= CONCURRENCY
+
+def test_slow_server_fails_after_every_attempt_times_out(serve):
+    server = serve(latency=0.5)
+    with pytest.raises(LoanAnalysisError, match='GPT API failed'):
+        asyncio.run(analyze_loan_approval(applicants(1)[0]))
+    assert server.requests == MAX_RETRIES + 1
+
+def test_retry_after_header_sets_the_delay(monkeypatch):
+    monkeypatch.setattr(get_gpt_response, 'LLM_BACKOFF_BASE', 10.0)
+    error = SimpleNamespace(response=SimpleNamespace(headers={'retry-after': '0.05'}))
+    assert get_gpt_response._retry_delay(error, attempt=5) == 0.05
+    without = SimpleNamespace(response=SimpleNamespace(headers={}))
+    assert 0 <= get_gpt_response._retry_delay(without, attempt=0) <= 10.0
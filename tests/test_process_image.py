@@ -0,0 +1,48 @@
+"""process_image reads every supported source type, in process and on the OCR pool"""
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+import document_processor
+from document_processor import process_image, shutdown_ocr_pool
+
+SOURCES = {
+    'bytes': bytes,
+    'bytearray': bytearray,
+    'memoryview': memoryview,
+    'stream': io.BytesIO,
+}
+
+@pytest.fixture(scope='module')
+def png():
+    image = Image.new('L', (900, 140), 255)
+    ImageDraw.Draw(image).text((20, 40), 'Gross Pay 2,500.00', fill=0, font=ImageFont.load_default(size=48))
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+@pytest.fixture(scope='module')
+def expected(png):
+    with pytest.MonkeyPatch.context() as patch:
+        # Every call below must really OCR
+        patch.setattr(document_processor, 'OCR_CACHE_DIR', '')
+        patch.setattr(document_processor, '_ocr_cache', None)
+        try:
+            text = process_image(png, max_workers=1)
+        except Exception as e:
+            pytest.skip(f"OCR is not available here: {e}")
+        yield text
+        shutdown_ocr_pool()
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+@pytest.mark.parametrize('source_type', SOURCES)
+def test_process_image_source_types(png, expected, source_type, max_workers):
+    assert process_image(SOURCES[source_type](png), max_workers=max_workers) == expected
+
+def test_process_image_while_pool_grows(png, expected):
+    # Each larger request replaces the shared pool while other threads are submitting to it
+    with ThreadPoolExecutor(max_workers=4) as threads:
+        texts = list(threads.map(lambda workers: process_image(png, max_workers=workers), [2, 3, 4, 5]))
+    assert texts == [expected] * 4
@@ -133,3 +133,27 @@ def display_summary(results, categories):
     st.write(f"Total files processed: {total_files}")
     st.write(f"Successfully classified: {successful}")
     st.write(f"Errors: {len(categories['Error'])}")
+
+def display_metrics_panel(snapshot):
+    """Display pipeline stage timings and counters in the sidebar"""
+    with st.sidebar.expander("Pipeline metrics"):
+        if not snapshot['stages'] and not snapshot['counters']:
+            st.write("No documents processed yet")
+            return
+        if snapshot['stages']:
+            st.dataframe(
+                [
+                    {
+                        'stage': s['stage'] + ''.join(f" [{v}]" for v in s['labels'].values()),
+                        'count': s['count'],
+                        'mean ms': round(s['mean'] * 1000, 2),
+                        'max ms': round(s['max'] * 1000, 2),
+                        'total s': round(s['total'], 3)
+                    }
+                    for s in snapshot['stages']
+                ],
+                hide_index=True
+            )
+        for counter in snapshot['counters']:
+            labels = ', '.join(f"{k}={v}" for k, v in counter['labels'].items())
+            st.write(f"- {counter['name']}{f' ({labels})' if labels else ''}: {counter['value']}")